@@ -0,0 +1,184 @@
+"""Buffered, append-only log of who read which patient/doctor/user record.
+
+Request handlers call `audit_read(...)`, which only appends a tuple to an
+in-memory buffer. A background thread drains the buffer into AccessAudit
+with bulk INSERTs every AUDIT_FLUSH_INTERVAL_MS, or sooner once
+AUDIT_FLUSH_BATCH records are waiting. Recording never touches the
+database. The buffer is bounded: when it is full, the oldest record is
+dropped and counted, and the flusher is woken. After a failed flush the
+flusher backs off exponentially, up to AUDIT_RETRY_MAX_SECONDS, so an
+outage costs one connection attempt per interval rather than one per
+request. Everything left is flushed on shutdown.
+
+    python -m app.audit [records]   # per-request overhead benchmark
+"""
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from fastapi import Request
+from sqlalchemy import insert
+from app import models
+from app.database import engine
+from app.core.config import (
+    AUDIT_BUFFER_CAPACITY, AUDIT_FLUSH_INTERVAL_MS, AUDIT_FLUSH_BATCH, AUDIT_RETRY_MAX_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+ACTOR_HEADER = "X-User-ID"
+_FIELDS = ("ActorID", "ClientIP", "Resource", "SubjectID", "Action", "AccessedAt")
+
+
+class AuditLog:
+    def __init__(self, engine, capacity=AUDIT_BUFFER_CAPACITY,
+                 flush_interval_ms=AUDIT_FLUSH_INTERVAL_MS, flush_batch=AUDIT_FLUSH_BATCH,
+                 retry_max_seconds=AUDIT_RETRY_MAX_SECONDS):
+        self.engine = engine
+        self.capacity = capacity
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_batch = flush_batch
+        self.retry_max_seconds = retry_max_seconds
+        self.failures = 0  # consecutive failed flushes
+        self._buffer = deque()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.recorded = 0
+        self.flushed = 0
+        self.dropped = 0
+
+    def record(self, resource: str, subject_id, actor_id=None, client_ip=None, action="read"):
+        self._buffer.append((actor_id, client_ip, resource, subject_id, action, datetime.utcnow()))
+        self.recorded += 1
+        size = len(self._buffer)
+        if size > self.capacity:
+            self._drop_oldest(size - self.capacity)
+        if size >= self.flush_batch:
+            self._wake.set()
+
+    def _drop_oldest(self, count):
+        for _ in range(count):
+            try:
+                self._buffer.popleft()
+            except IndexError:  # drained by the flusher meanwhile
+                return
+            self.dropped += 1
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows inserted."""
+        with self._flush_lock:
+            written = 0
+            while self._buffer:
+                batch = []
+                while self._buffer and len(batch) < self.flush_batch:
+                    batch.append(self._buffer.popleft())
+                try:
+                    with self.engine.begin() as conn:
+                        conn.execute(insert(models.AccessAudit), [dict(zip(_FIELDS, row)) for row in batch])
+                except Exception:
+                    if self.failures == 0:
+                        logger.exception("Flushing %d audit records failed", len(batch))
+                    else:
+                        logger.warning("Flushing audit records failed again (%d in a row)", self.failures + 1)
+                    self.failures += 1
+                    self._buffer.extendleft(reversed(batch))
+                    self._drop_oldest(len(self._buffer) - self.capacity)
+                    break
+                self.failures = 0
+                written += len(batch)
+            self.flushed += written
+            return written
+
+    def retry_delay(self):
+        """Seconds the flusher waits after the current run of failed flushes."""
+        return min(self.flush_interval * 2 ** self.failures, self.retry_max_seconds)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.failures:
+                # A full buffer doesn't cut the backoff short; only shutdown does
+                self._stop.wait(self.retry_delay())
+            else:
+                self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and write out whatever is still buffered."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.flush()
+
+    def metrics(self):
+        return {
+            "buffered": len(self._buffer),
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "consecutive_failures": self.failures,
+        }
+
+
+audit_log = AuditLog(engine)
+
+
+def audit_read(request: Request, resource: str, subject_id: int):
+    """Record that the caller read `resource` `subject_id`."""
+    actor = request.headers.get(ACTOR_HEADER)
+    audit_log.record(
+        resource,
+        subject_id,
+        actor_id=int(actor) if actor and actor.isdigit() else None,
+        client_ip=request.client.host if request.client else None,
+    )
+
+
+def benchmark(records: int = 20000):
+    """Compare buffered recording with a synchronous insert per request."""
+    import os
+    import tempfile
+    from time import perf_counter
+    from sqlalchemy import create_engine
+    from app.database import Base
+
+    path = os.path.join(tempfile.mkdtemp(), "audit_bench.db")
+    bench_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bench_engine, tables=[models.AccessAudit.__table__])
+
+    log = AuditLog(bench_engine)
+    log.start()
+    started = perf_counter()
+    for i in range(records):
+        log.record("patient_profile", i, actor_id=1, client_ip="127.0.0.1")
+    buffered = (perf_counter() - started) / records * 1e6
+    log.stop()
+
+    sync_records = min(records, 2000)
+    started = perf_counter()
+    for i in range(sync_records):
+        with bench_engine.begin() as conn:
+            conn.execute(insert(models.AccessAudit), {
+                "ActorID": 1, "ClientIP": "127.0.0.1", "Resource": "patient_profile",
+                "SubjectID": i, "Action": "read", "AccessedAt": datetime.utcnow(),
+            })
+    synchronous = (perf_counter() - started) / sync_records * 1e6
+
+    print(f"buffered record():   {buffered:10.2f} us/request")
+    print(f"synchronous insert:  {synchronous:10.2f} us/request")
+    print(f"rows written by flusher: {log.flushed}")
+
+
+if __name__ == "__main__":
+    import sys
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
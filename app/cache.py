@@ -0,0 +1,293 @@
+"""Process-local caches kept coherent across workers by an invalidation bus.
+
+Write paths call `publish(db, cache, key)` before they commit. That adds a
+row to CacheInvalidations (and a NOTIFY on Postgres) to the same
+transaction, so every worker hears about the change exactly when it
+commits. Each worker runs one `InvalidationSubscriber` thread. It evicts
+keys as messages arrive; on Postgres it LISTENs, elsewhere it polls the
+table. Messages carry the row's sequence number. A gap that stays open
+past CACHE_GAP_GRACE_SECONDS, or a lost LISTEN connection, means messages
+may have been missed, so the worker flushes every cache. A gap can also be
+a transaction that simply hasn't committed yet, so flushed gap numbers
+keep being fetched for CACHE_LATE_WINDOW_SECONDS and applied if they show
+up after the flush.
+"""
+import logging
+import select
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from time import monotonic
+from sqlalchemy import event, or_, text
+from sqlalchemy.orm import Session
+from app import models
+from app.coalesce import SingleFlight
+from app.core.config import (
+    CACHE_MAX_ENTRIES, CACHE_POLL_SECONDS, CACHE_GAP_GRACE_SECONDS, CACHE_LATE_WINDOW_SECONDS,
+    CACHE_INVALIDATION_RETENTION_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"
+_MISSING = object()
+_caches = {}
+
+
+class LocalCache:
+    """Thread-safe LRU cache for one kind of data in this process (keys are str'd)."""
+
+    def __init__(self, name: str, max_entries: int = CACHE_MAX_ENTRIES):
+        self.name = name
+        self.max_entries = max_entries
+        self.generation = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.flight = SingleFlight(name)
+        _caches[name] = self
+
+    def get(self, key, default=None):
+        key = str(key)
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, generation=None):
+        """Store a value, unless an eviction happened since `generation` was read."""
+        key = str(key)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            return True
+
+    def get_or_load(self, key, loader):
+        """Return the cached value or `loader()`; None results are not cached.
+
+        Concurrent misses for the same key share one `loader()` call. The
+        generation is part of the flight key, so a request arriving after an
+        invalidation never joins a load that started before it.
+
+        `loader` must read the primary (a `get_db` session), never a replica:
+        a lagging replica would refill an invalidated entry with the old row.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        generation = self.generation
+        value = self.flight.do((str(key), generation), loader)
+        if value is not None:
+            # Skipped if an invalidation raced the load, so stale rows never stick
+            self.set(key, value, generation)
+        return value
+
+    def evict(self, key):
+        key = str(key)
+        with self._lock:
+            self.generation += 1
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+
+# Rendered JSON of single rows, keyed by UserID
+user_cache = LocalCache("user")
+doctor_profile_cache = LocalCache("doctor_profile")
+patient_profile_cache = LocalCache("patient_profile")
+employee_profile_cache = LocalCache("employee_profile")
+
+
+def get_cache(name: str):
+    return _caches.get(name) or LocalCache(name)
+
+
+def flush_all():
+    for cache in list(_caches.values()):
+        cache.clear()
+
+
+def _apply(cache_name: str, key):
+    cache = _caches.get(cache_name)
+    if cache is None:
+        return
+    if key is None:
+        cache.clear()
+    else:
+        cache.evict(key)
+
+
+# -------- Publishing --------
+def publish(db: Session, cache_name: str, key=None):
+    """Queue an invalidation in the caller's transaction; it fires on commit."""
+    message = models.CacheInvalidation(Cache=cache_name, Key=None if key is None else str(key))
+    db.add(message)
+    db.flush()
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_notify(:channel, :payload)"),
+                   {"channel": CHANNEL, "payload": str(message.Seq)})
+    # This worker evicts straight away once the write is committed
+    event.listen(db, "after_commit", lambda session: _apply(cache_name, message.Key), once=True)
+
+
+# -------- Subscribing --------
+class InvalidationSubscriber:
+    def __init__(self, engine, poll_seconds=CACHE_POLL_SECONDS, grace_seconds=CACHE_GAP_GRACE_SECONDS,
+                 late_window_seconds=CACHE_LATE_WINDOW_SECONDS):
+        self.engine = engine
+        self.poll_seconds = poll_seconds
+        self.grace_seconds = grace_seconds
+        self.late_window_seconds = late_window_seconds
+        self.last_seq = 0
+        self.missing = {}  # seq -> when the gap was first seen
+        self.late = {}  # seq -> when it was flushed as a gap; applied if it commits later
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_prune = monotonic()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="cache-invalidation", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _reset(self, conn):
+        """Flush everything and start from the newest sequence number."""
+        flush_all()
+        self.missing.clear()
+        self.late.clear()
+        self.last_seq = self._newest(conn)
+
+    def _newest(self, conn):
+        return conn.execute(text('SELECT COALESCE(MAX("Seq"), 0) FROM "CacheInvalidations"')).scalar()
+
+    def _fetch(self, conn, newer: bool, seqs=()):
+        """Apply `seqs`, rows that fill known or flushed gaps and, when polling, every newer row."""
+        table = models.CacheInvalidation.__table__
+        conditions = []
+        if newer:
+            conditions.append(table.c.Seq > self.last_seq)
+        wanted = set(seqs) | set(self.missing) | set(self.late)
+        if wanted:
+            conditions.append(table.c.Seq.in_(sorted(wanted)))
+        if not conditions:
+            return
+        rows = conn.execute(
+            table.select().where(or_(*conditions)).order_by(table.c.Seq)
+        ).all()
+        for row in rows:
+            self.handle(row.Seq, row.Cache, row.Key)
+
+    def handle(self, seq: int, cache_name: str, key):
+        _apply(cache_name, key)
+        now = monotonic()
+        for gap in range(self.last_seq + 1, seq):
+            self.missing.setdefault(gap, now)
+        self.last_seq = max(self.last_seq, seq)
+        self.missing.pop(seq, None)
+        self.late.pop(seq, None)
+
+    def _check_gaps(self, conn):
+        now = monotonic()
+        expired = [seq for seq, flushed in self.late.items() if flushed < now - self.late_window_seconds]
+        for seq in expired:
+            del self.late[seq]  # treated as rolled back
+        if not self.missing:
+            return
+        self._fetch(conn, newer=False)
+        if any(seen < now - self.grace_seconds for seen in self.missing.values()):
+            # Either rolled back, missed or not committed yet: flush now, and
+            # keep watching for the gap rows in case they commit after all
+            logger.info("Cache invalidation gap not filled; flushing all caches")
+            flush_all()
+            self.late.update(dict.fromkeys(self.missing, now))
+            self.missing.clear()
+
+    def _prune(self, conn):
+        if monotonic() - self._last_prune < 3600:
+            return
+        self._last_prune = monotonic()
+        cutoff = datetime.utcnow() - timedelta(seconds=CACHE_INVALIDATION_RETENTION_SECONDS)
+        with conn.begin():
+            conn.execute(models.CacheInvalidation.__table__.delete().where(
+                models.CacheInvalidation.CreatedAt < cutoff
+            ))
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.engine.dialect.name == "postgresql":
+                    self._listen()
+                else:
+                    self._poll()
+            except Exception:
+                logger.exception("Cache invalidation subscriber failed; reconnecting")
+                self._stop.wait(1)
+
+    def _poll(self):
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            self._reset(conn)
+            while not self._stop.is_set():
+                if self._newest(conn) < self.last_seq:
+                    # Table emptied by pruning and Seq restarted lower (SQLite rowid reuse)
+                    self._reset(conn)
+                self._fetch(conn, newer=True)
+                self._check_gaps(conn)
+                self._prune(conn)
+                self._stop.wait(self.poll_seconds)
+
+    def _listen(self):
+        raw = self.engine.raw_connection()
+        raw.detach()
+        listener = raw.dbapi_connection
+        listener.autocommit = True
+        try:
+            with listener.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                # Anything committed before LISTEN took effect is covered by the reset
+                self._reset(conn)
+                while not self._stop.is_set():
+                    if select.select([listener], [], [], self.poll_seconds)[0]:
+                        listener.poll()
+                        seqs = sorted(int(note.payload) for note in listener.notifies)
+                        listener.notifies.clear()
+                        if seqs:
+                            for seq in range(self.last_seq + 1, seqs[-1] + 1):
+                                self.missing.setdefault(seq, monotonic())
+                            # Notified rows are always applied, even ones at or below
+                            # last_seq that committed after their gap was flushed
+                            self._fetch(conn, newer=False, seqs=seqs)
+                    self._check_gaps(conn)
+                    self._prune(conn)
+        finally:
+            listener.close()
+
+
+_subscriber = None
+
+
+def start_subscriber(engine):
+    global _subscriber
+    if _subscriber is None:
+        _subscriber = InvalidationSubscriber(engine)
+        _subscriber.start()
+    return _subscriber
+
+
+def stop_subscriber():
+    global _subscriber
+    if _subscriber is not None:
+        _subscriber.stop()
+        _subscriber = None
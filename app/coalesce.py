@@ -0,0 +1,95 @@
+"""Single-flight coalescing of identical concurrent reads.
+
+When several requests ask for the same thing at once, only the first (the
+leader) runs the query; the rest wait for it and get the same result, or
+the same exception. Nothing is kept once the flight lands, so this is not
+a cache. It only collapses work that is already in progress.
+
+Results are shared between requests, so coalesce immutable values such as
+rendered JSON bytes, never ORM objects bound to the leader's session.
+`SingleFlight.do` blocks, so call it from sync (threadpool) handlers.
+"""
+import threading
+from fastapi import Request
+
+_groups = {}
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.calls = 0
+        self.executions = 0
+        self.suppressed = 0
+        self.errors = 0
+        self.peak_in_flight = 0
+        self.peak_waiters = 0
+        _groups[name] = self
+
+    def do(self, key, fn):
+        """Return `fn()`, sharing one execution among concurrent callers with the same key."""
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.executions += 1
+                self.peak_in_flight = max(self.peak_in_flight, len(self._flights))
+            else:
+                flight.waiters += 1
+                self.suppressed += 1
+                self.peak_waiters = max(self.peak_waiters, flight.waiters)
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "suppressed": self.suppressed,
+                "errors": self.errors,
+                "in_flight": len(self._flights),
+                "peak_in_flight": self.peak_in_flight,
+                "peak_waiters": self.peak_waiters,
+            }
+
+
+def request_key(request: Request):
+    """Route plus parameters: the path (with path params) and the sorted query string."""
+    return request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+
+def metrics():
+    return {name: group.metrics() for name, group in _groups.items()}
+
+
+appointments_today_flight = SingleFlight("appointments_today")
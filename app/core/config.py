@@ -0,0 +1,108 @@
+import json
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# -------- Read replicas --------
+# Comma-separated DSNs; leave empty to serve every read from the primary
+REPLICA_URLS = [url.strip() for url in os.getenv("REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_HEALTH_INTERVAL_SECONDS = float(os.getenv("REPLICA_HEALTH_INTERVAL_SECONDS", "10"))
+# After a write, the client reads from the primary for this long; covers lag that
+# grows between health probes
+REPLICA_READ_AFTER_WRITE_SECONDS = float(os.getenv(
+    "REPLICA_READ_AFTER_WRITE_SECONDS", str(REPLICA_MAX_LAG_SECONDS + REPLICA_HEALTH_INTERVAL_SECONDS)
+))
+
+# -------- Login throttling --------
+# Per email address
+LOGIN_RATE_PER_MINUTE = float(os.getenv("LOGIN_RATE_PER_MINUTE", "10"))
+LOGIN_BURST = int(os.getenv("LOGIN_BURST", "5"))
+# Per client IP; loose, since a whole clinic can share one NAT address
+LOGIN_IP_RATE_PER_MINUTE = float(os.getenv("LOGIN_IP_RATE_PER_MINUTE", "120"))
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "60"))
+LOGIN_MAX_FAILURES = int(os.getenv("LOGIN_MAX_FAILURES", "5"))
+LOGIN_FAILURE_WINDOW_SECONDS = float(os.getenv("LOGIN_FAILURE_WINDOW_SECONDS", "300"))
+LOGIN_LOCKOUT_SECONDS = float(os.getenv("LOGIN_LOCKOUT_SECONDS", "900"))
+LOGIN_THROTTLE_MAX_KEYS = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", "100000"))
+
+# -------- Partitioning & archiving --------
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+# Most rows one archive read returns
+ARCHIVE_READ_LIMIT = int(os.getenv("ARCHIVE_READ_LIMIT", "1000"))
+ATTENDANCE_RETENTION_MONTHS = int(os.getenv("ATTENDANCE_RETENTION_MONTHS", "24"))
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+# -------- Background jobs --------
+# "queue:concurrency" pairs; limits apply per worker process
+JOB_QUEUES = {
+    name.strip(): int(limit)
+    for name, limit in (
+        item.split(":") for item in os.getenv("JOB_QUEUES", "default:4,reports:1").split(",") if item.strip()
+    )
+}
+JOB_POOL = os.getenv("JOB_POOL", "thread")  # "thread" or "process"
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+JOB_LOCK_TIMEOUT_SECONDS = float(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", "900"))
+# Running jobs refresh their lock this often, so only dead workers' jobs go stale
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "60"))
+JOB_BACKOFF_BASE_SECONDS = float(os.getenv("JOB_BACKOFF_BASE_SECONDS", "10"))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "3600"))
+# Modules imported by the API and the worker so their @job handlers are registered
+JOB_MODULES = [
+    name.strip()
+    for name in os.getenv("JOB_MODULES", "app.reconciliation,app.payroll").split(",") if name.strip()
+]
+
+# -------- Cache invalidation bus --------
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_POLL_SECONDS = float(os.getenv("CACHE_POLL_SECONDS", "0.2"))
+# How long a gap in invalidation sequence numbers may stay open before every cache is flushed
+CACHE_GAP_GRACE_SECONDS = float(os.getenv("CACHE_GAP_GRACE_SECONDS", "2"))
+# Sequence numbers flushed as gaps are still fetched this long, in case they commit late
+CACHE_LATE_WINDOW_SECONDS = float(os.getenv("CACHE_LATE_WINDOW_SECONDS", "600"))
+CACHE_INVALIDATION_RETENTION_SECONDS = float(os.getenv("CACHE_INVALIDATION_RETENTION_SECONDS", "86400"))
+
+# -------- Idempotency keys --------
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# A running request's key is taken over after this long (its worker is assumed dead)
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+# How long a duplicate waits for the original before getting 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+IDEMPOTENCY_POLL_SECONDS = float(os.getenv("IDEMPOTENCY_POLL_SECONDS", "0.1"))
+IDEMPOTENCY_PRUNE_SECONDS = float(os.getenv("IDEMPOTENCY_PRUNE_SECONDS", "300"))
+
+# -------- Exports --------
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "10000"))
+
+# -------- Access audit log --------
+AUDIT_BUFFER_CAPACITY = int(os.getenv("AUDIT_BUFFER_CAPACITY", "100000"))
+AUDIT_FLUSH_INTERVAL_MS = int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "500"))
+AUDIT_FLUSH_BATCH = int(os.getenv("AUDIT_FLUSH_BATCH", "1000"))
+# Longest wait between flush retries while the database is unreachable
+AUDIT_RETRY_MAX_SECONDS = float(os.getenv("AUDIT_RETRY_MAX_SECONDS", "30"))
+
+# -------- Mobile delta sync --------
+# Watermarks trail "now" by this much so rows flushed before a slow commit aren't skipped
+SYNC_SAFETY_SECONDS = float(os.getenv("SYNC_SAFETY_SECONDS", "60"))
+
+# -------- Payroll hours --------
+# JSON keyed by "Division/Ward", "Division" or "default"; start is HH:MM local time
+SHIFT_RULES = json.loads(os.getenv(
+    "SHIFT_RULES", '{"default": {"start": "09:00", "hours": 8, "grace_minutes": 10}}'
+))
+PAYROLL_BATCH_SIZE = int(os.getenv("PAYROLL_BATCH_SIZE", "50000"))
+# Days before today that may still be edited (late punch-outs) and are recomputed incrementally
+PAYROLL_OPEN_DAYS = int(os.getenv("PAYROLL_OPEN_DAYS", "2"))
+
+# -------- Walk-in queue --------
+# Minutes a RiskCategory is moved ahead of its arrival time
+WALKIN_RISK_BOOST_MINUTES = json.loads(os.getenv("WALKIN_RISK_BOOST_MINUTES", '{"High": 30, "Medium": 10}'))
+WALKIN_DEFAULT_CONSULT_MINUTES = float(os.getenv("WALKIN_DEFAULT_CONSULT_MINUTES", "10"))
+WALKIN_DURATION_WINDOW = int(os.getenv("WALKIN_DURATION_WINDOW", "20"))
+
+# -------- Batch lookups --------
+BATCH_MAX_IDS = int(os.getenv("BATCH_MAX_IDS", "200"))
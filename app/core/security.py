@@ -0,0 +1,146 @@
+import threading
+from collections import OrderedDict, deque
+from time import monotonic
+from app.core.config import (
+    LOGIN_RATE_PER_MINUTE, LOGIN_BURST, LOGIN_IP_RATE_PER_MINUTE, LOGIN_IP_BURST, LOGIN_MAX_FAILURES,
+    LOGIN_FAILURE_WINDOW_SECONDS, LOGIN_LOCKOUT_SECONDS, LOGIN_THROTTLE_MAX_KEYS
+)
+
+
+class _BoundedDict(OrderedDict):
+    """LRU dict that drops the least recently used key past `max_keys`."""
+
+    def __init__(self, max_keys):
+        super().__init__()
+        self.max_keys = max_keys
+        self.evictions = 0
+
+    def touch(self, key, default_factory):
+        if key in self:
+            self.move_to_end(key)
+            return self[key]
+        value = self[key] = default_factory()
+        if len(self) > self.max_keys:
+            self.popitem(last=False)
+            self.evictions += 1
+        return value
+
+
+class LoginThrottle:
+    """Token-bucket limiter plus failure lockout for login endpoints.
+
+    Every attempt spends one token from the bucket of its email and one from
+    the much looser bucket of its client IP, so a clinic behind one NAT
+    address isn't limited as if it were one user. `LOGIN_MAX_FAILURES`
+    failures inside the sliding window lock out that IP/email pair for
+    `LOGIN_LOCKOUT_SECONDS`; other staff on the same IP, and the same user
+    from elsewhere, can still sign in. `check()` runs before any database
+    lookup, so rejected attempts never pay for an Argon2 verify.
+    """
+
+    def __init__(self, rate_per_minute=LOGIN_RATE_PER_MINUTE, burst=LOGIN_BURST,
+                 ip_rate_per_minute=LOGIN_IP_RATE_PER_MINUTE, ip_burst=LOGIN_IP_BURST,
+                 max_failures=LOGIN_MAX_FAILURES, window=LOGIN_FAILURE_WINDOW_SECONDS,
+                 lockout=LOGIN_LOCKOUT_SECONDS, max_keys=LOGIN_THROTTLE_MAX_KEYS):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.ip_rate = ip_rate_per_minute / 60.0
+        self.ip_burst = ip_burst
+        self.max_failures = max_failures
+        self.window = window
+        self.lockout = lockout
+        self._buckets = _BoundedDict(max_keys)   # key -> [tokens, updated_at]
+        self._failures = _BoundedDict(max_keys)  # (ip, email) key -> deque of failure times
+        self._locked = _BoundedDict(max_keys)    # (ip, email) key -> locked_until
+        self._accounts = _BoundedDict(max_keys)  # emails that reached verify_password
+        self._lock = threading.Lock()
+        self._verify_seconds = 0.0
+        self._verify_count = 0
+        self.allowed = 0
+        self.rejected_rate = 0
+        self.rejected_lockout = 0
+        self.hashes_shed = 0
+
+    @staticmethod
+    def _pair_key(ip, email):
+        return f"ip-email:{ip}|{email.lower()}"
+
+    def _shed(self, email):
+        # Only rejections for real accounts would have cost a password verify
+        if email.lower() in self._accounts:
+            self.hashes_shed += 1
+
+    def check(self, ip, email):
+        """Return seconds to wait before retrying, or None if the attempt may proceed."""
+        now = monotonic()
+        pair = self._pair_key(ip, email)
+        with self._lock:
+            locked_until = self._locked.get(pair)
+            if locked_until is not None:
+                if locked_until > now:
+                    self.rejected_lockout += 1
+                    self._shed(email)
+                    return locked_until - now
+                del self._locked[pair]
+
+            limits = ((f"email:{email.lower()}", self.rate, self.burst),
+                      (f"ip:{ip}", self.ip_rate, self.ip_burst))
+            buckets = []
+            for key, rate, burst in limits:
+                bucket = self._buckets.touch(key, lambda: [float(burst), now])
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+                buckets.append((bucket, rate))
+            empty = [(bucket, rate) for bucket, rate in buckets if bucket[0] < 1]
+            if empty:
+                self.rejected_rate += 1
+                self._shed(email)
+                return max((1 - bucket[0]) / rate for bucket, rate in empty)
+
+            for bucket, _ in buckets:
+                bucket[0] -= 1
+            self.allowed += 1
+            return None
+
+    def record_failure(self, ip, email):
+        now = monotonic()
+        key = self._pair_key(ip, email)
+        with self._lock:
+            failures = self._failures.touch(key, deque)
+            failures.append(now)
+            while failures and failures[0] <= now - self.window:
+                failures.popleft()
+            if len(failures) >= self.max_failures:
+                self._locked.touch(key, lambda: 0.0)
+                self._locked[key] = now + self.lockout
+                failures.clear()
+
+    def record_success(self, ip, email):
+        with self._lock:
+            self._failures.pop(self._pair_key(ip, email), None)
+
+    def record_verify(self, email, seconds):
+        """Feed the cost of a real password verify into the shed-work estimate."""
+        with self._lock:
+            self._accounts.touch(email.lower(), lambda: True)
+            self._verify_seconds += seconds
+            self._verify_count += 1
+
+    def metrics(self):
+        with self._lock:
+            avg_verify = self._verify_seconds / self._verify_count if self._verify_count else 0.0
+            return {
+                "allowed": self.allowed,
+                "rejected_rate_limited": self.rejected_rate,
+                "rejected_locked_out": self.rejected_lockout,
+                "hashes_shed": self.hashes_shed,
+                "avg_verify_seconds": avg_verify,
+                "hash_seconds_shed": self.hashes_shed * avg_verify,
+                "tracked_keys": len(self._buckets),
+                "locked_keys": len(self._locked),
+                "evictions": (self._buckets.evictions + self._failures.evictions
+                              + self._locked.evictions + self._accounts.evictions),
+            }
+
+
+login_throttle = LoginThrottle()
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from app import models, schemas
+from app.cache import publish
 
 def get_doctor_profile(db: Session, user_id: int):
     """Fetch doctor profile"""
@@ -23,6 +24,7 @@ def create_or_update_doctor_profile(db: Session, user_id: int, data: schemas.Doc
         profile = models.DoctorProfile(DoctorID=user_id, **data_dict)
         db.add(profile)
 
+    publish(db, "doctor_profile", user_id)
     db.commit()
     db.refresh(profile)
     return profile
@@ -33,6 +35,7 @@ def delete_doctor_profile(db: Session, user_id: int):
     profile = db.query(models.DoctorProfile).filter(models.DoctorProfile.DoctorID == user_id).first()
     if profile:
         db.delete(profile)
+        publish(db, "doctor_profile", user_id)
         db.commit()
         return True
     return False
@@ -1,6 +1,7 @@
-from datetime import date
-from sqlalchemy.orm import Session
+from datetime import date, datetime, time, timedelta
+from sqlalchemy.orm import Session, aliased
 from app import models, schemas
+from app.cache import publish
 
 def get_employee_profile(db: Session, user_id: int):
     """Fetch employee profile"""
@@ -19,6 +20,7 @@ def create_or_update_employee_profile(db: Session, user_id: int, data: schemas.E
         profile = models.Employee(EmployeeID=user_id, **data_dict)
         db.add(profile)
 
+    publish(db, "employee_profile", user_id)
     db.commit()
     db.refresh(profile)
     return profile
@@ -29,42 +31,55 @@ def delete_employee_profile(db: Session, user_id: int):
     profile = db.query(models.Employee).filter(models.Employee.EmployeeID == user_id).first()
     if profile:
         db.delete(profile)
+        publish(db, "employee_profile", user_id)
         db.commit()
         return True
     return False
 
 def get_todays_appointments(db: Session):
-    today = date.today()
+    """Fetch today's appointments with doctor and patient names in one query"""
+    start = datetime.combine(date.today(), time.min)
+    end = start + timedelta(days=1)
 
-    # Join Appointments with DoctorProfile and PatientProfile to get UserIDs
+    # DoctorID / PatientID are the owning UserIDs, so join Users directly
+    doctor_user = aliased(models.User)
+    patient_user = aliased(models.User)
     appointments = (
         db.query(
             models.Appointment.AppointmentID,
             models.Appointment.DoctorID,
             models.Appointment.PatientID,
-            models.Appointment.AppointmentDate,
-            models.Appointment.Time,
-            models.DoctorProfile.user.label("DoctorUserID"),
-            models.PatientProfile.user.label("PatientUserID")
+            models.Appointment.DateTime,
+            models.Appointment.Type,
+            models.Appointment.Status,
+            doctor_user.FirstName.label("DoctorFirstName"),
+            doctor_user.LastName.label("DoctorLastName"),
+            patient_user.FirstName.label("PatientFirstName"),
+            patient_user.LastName.label("PatientLastName"),
         )
-        .join(models.DoctorProfile, models.Appointment.DoctorID == models.DoctorProfile.DoctorID)
-        .join(models.PatientProfile, models.Appointment.PatientID == models.PatientProfile.PatientID)
-        .filter(models.Appointment.AppointmentDate == today)
+        .outerjoin(doctor_user, models.Appointment.DoctorID == doctor_user.UserID)
+        .outerjoin(patient_user, models.Appointment.PatientID == patient_user.UserID)
+        .filter(models.Appointment.DateTime >= start, models.Appointment.DateTime < end)
+        .order_by(models.Appointment.DateTime)
         .all()
     )
 
-    # Convert IDs to full names
-    result = []
-    for appt in appointments:
-        doctor_user = db.query(models.User).filter(models.User.UserID == appt.DoctorUserID).first()
-        patient_user = db.query(models.User).filter(models.User.UserID == appt.PatientUserID).first()
-        result.append({
+    return [
+        {
             "AppointmentID": appt.AppointmentID,
             "DoctorID": appt.DoctorID,
-            "DoctorName": f"{doctor_user.FirstName} {doctor_user.LastName}" if doctor_user else None,
+            "DoctorName": _full_name(appt.DoctorFirstName, appt.DoctorLastName),
             "PatientID": appt.PatientID,
-            "PatientName": f"{patient_user.FirstName} {patient_user.LastName}" if patient_user else None,
-            "AppointmentDate": appt.AppointmentDate,
-            "AppointmentTime": appt.Time,
-        })
-    return result
+            "PatientName": _full_name(appt.PatientFirstName, appt.PatientLastName),
+            "DateTime": appt.DateTime,
+            "Type": appt.Type,
+            "Status": appt.Status,
+        }
+        for appt in appointments
+    ]
+
+
+def _full_name(first_name, last_name):
+    if first_name is None:
+        return None
+    return f"{first_name} {last_name}" if last_name else first_name
@@ -1,5 +1,10 @@
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, selectinload
 from app import models, schemas
+from app.core.config import SYNC_SAFETY_SECONDS
+from app.cache import publish
 
 def get_patient_profile(db: Session, user_id: int):
     """Fetch patient profile"""
@@ -23,6 +28,7 @@ def create_or_update_patient_profile(db: Session, user_id: int, data: schemas.Pa
         profile = models.PatientProfile(PatientID=user_id, **data_dict)
         db.add(profile)
 
+    publish(db, "patient_profile", user_id)
     db.commit()
     db.refresh(profile)
     return profile
@@ -33,6 +39,7 @@ def delete_patient_profile(db: Session, user_id: int):
     profile = db.query(models.PatientProfile).filter(models.PatientProfile.PatientID == user_id).first()
     if profile:
         db.delete(profile)
+        publish(db, "patient_profile", user_id)
         db.commit()
         return True
     return False
@@ -49,4 +56,110 @@ def create_appointment(db: Session, data: schemas.AppointmentCreate):
     db.add(appointment)
     db.commit()
     db.refresh(appointment)
-    return appointment
\ No newline at end of file
+    return appointment
+
+
+def get_patient_timeline(db: Session, patient_id: int, before: Optional[datetime] = None,
+                         before_id: Optional[int] = None, limit: int = 20):
+    """Fetch a page of appointments with their full clinical graph.
+
+    Consultations, bookings (with reports) and bills are loaded with
+    selectinload, so a page costs five queries however long the history is.
+    Pages run newest first; pass the last row's DateTime/AppointmentID as
+    `before`/`before_id` to get the next page.
+    """
+    Appointment = models.Appointment
+    query = (
+        db.query(Appointment)
+        .options(
+            selectinload(Appointment.consultations),
+            selectinload(Appointment.bookings).selectinload(models.InvestigationBooking.reports),
+            selectinload(Appointment.bills),
+        )
+        # Undated appointments have no place on a timeline and can't be paged by keyset
+        .filter(Appointment.PatientID == patient_id, Appointment.DateTime.isnot(None))
+    )
+    if before is not None:
+        if before_id is not None:
+            query = query.filter(or_(
+                Appointment.DateTime < before,
+                and_(Appointment.DateTime == before, Appointment.AppointmentID < before_id),
+            ))
+        else:
+            query = query.filter(Appointment.DateTime < before)
+
+    appointments = (
+        query.order_by(Appointment.DateTime.desc(), Appointment.AppointmentID.desc())
+        .limit(limit)
+        .all()
+    )
+    last = appointments[-1] if len(appointments) == limit else None
+    return {
+        "PatientID": patient_id,
+        "Appointments": appointments,
+        "NextBefore": last.DateTime if last else None,
+        "NextBeforeID": last.AppointmentID if last else None,
+    }
+
+
+def get_patient_changes(db: Session, patient_id: int, since: Optional[datetime] = None):
+    """Rows of a patient's record changed or deleted after `since` (all rows if None).
+
+    Appointments and tombstones are found through (PatientID, UpdatedAt) and
+    (PatientID, DeletedAt) indexes, and the joined tables through their
+    indexed foreign keys, so the cost tracks this patient's record and never
+    the changes of every other patient since the watermark.
+    The returned watermark trails now by SYNC_SAFETY_SECONDS so a row
+    flushed before a slow commit is re-sent rather than skipped; clients
+    apply changes as upserts, so repeats are harmless.
+    """
+    watermark = datetime.utcnow() - timedelta(seconds=SYNC_SAFETY_SECONDS)
+    Appointment = models.Appointment
+    Booking = models.InvestigationBooking
+
+    def changed(query, model):
+        return query.filter(model.UpdatedAt > since) if since is not None else query
+
+    profile = changed(
+        db.query(models.PatientProfile).filter(models.PatientProfile.PatientID == patient_id),
+        models.PatientProfile,
+    ).first()
+    appointments = changed(db.query(Appointment).filter(Appointment.PatientID == patient_id), Appointment).all()
+    consultations = changed(
+        db.query(models.Consultation)
+        .join(Appointment, models.Consultation.AppointmentID == Appointment.AppointmentID)
+        .filter(Appointment.PatientID == patient_id),
+        models.Consultation,
+    ).all()
+    bookings = changed(
+        db.query(Booking)
+        .join(Appointment, Booking.AppointmentID == Appointment.AppointmentID)
+        .filter(Appointment.PatientID == patient_id),
+        Booking,
+    ).all()
+    reports = changed(
+        db.query(models.Report)
+        .join(Booking, models.Report.BookingID == Booking.BookingID)
+        .join(Appointment, Booking.AppointmentID == Appointment.AppointmentID)
+        .filter(Appointment.PatientID == patient_id),
+        models.Report,
+    ).all()
+
+    tombstones = []
+    if since is not None:
+        tombstones = (
+            db.query(models.SyncTombstone)
+            .filter(models.SyncTombstone.PatientID == patient_id, models.SyncTombstone.DeletedAt > since)
+            .order_by(models.SyncTombstone.DeletedAt)
+            .all()
+        )
+
+    return {
+        "Watermark": watermark,
+        "Profile": profile,
+        "Appointments": appointments,
+        "Consultations": consultations,
+        "Bookings": bookings,
+        "Reports": reports,
+        "Tombstones": tombstones,
+    }
@@ -1,8 +1,16 @@
-from sqlalchemy.orm import Session
+import logging
+import threading
+from sqlalchemy import func, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
 from passlib.context import CryptContext
 from app import models, schemas
+from app.core.bloom import BloomFilter
+from app.cache import publish
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 # Using Argon2 for hashing
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
@@ -48,6 +56,107 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.refresh(db_user)
     return db_user
 
+# -------- Registration --------
+# Bloom filter of every registered email/phone, built at startup. It only
+# ever answers "definitely new" or "maybe taken"; a maybe is confirmed with
+# one indexed lookup before we pay for an Argon2 hash. The filter is built
+# from a snapshot of Users without holding the lock, then swapped in, so
+# registrations never wait behind the table scan. Until it is ready, every
+# registration takes the indexed lookup.
+_identity_filter = None
+_identity_filter_lock = threading.Lock()
+_added_during_build = None  # keys registered while a build runs; None when idle
+
+
+def _identity_keys(email: str, phone: str):
+    return (f"email:{email}", f"phone:{phone}")
+
+
+def build_identity_filter(engine):
+    """Rebuild the filter from the Users table and swap it in."""
+    global _identity_filter, _added_during_build
+    with _identity_filter_lock:
+        if _added_during_build is not None:
+            return  # another build is running
+        _added_during_build = []
+    try:
+        with engine.connect() as conn:
+            users = conn.execute(select(func.count()).select_from(models.User)).scalar()
+            identities = BloomFilter(capacity=max(200_000, 4 * users))
+            rows = conn.execute(
+                select(models.User.Email, models.User.Phone).execution_options(yield_per=5000)
+            )
+            for email, phone in rows:
+                for key in _identity_keys(email, phone):
+                    identities.add(key)
+    except Exception:
+        with _identity_filter_lock:
+            _added_during_build = None
+        raise
+    with _identity_filter_lock:
+        # Users registered after the snapshot may be missing from it
+        for key in _added_during_build:
+            identities.add(key)
+        _identity_filter, _added_during_build = identities, None
+
+
+def build_identity_filter_in_background(engine):
+    def run():
+        try:
+            build_identity_filter(engine)
+        except Exception:
+            logger.exception("Building the registration Bloom filter failed")
+
+    threading.Thread(target=run, name="identity-filter", daemon=True).start()
+
+
+def _taken_field(db: Session, email: str, phone: str):
+    """Return "Email"/"Phone" if either is already registered, else None."""
+    row = db.execute(
+        select(models.User.Email)
+        .where(or_(models.User.Email == email, models.User.Phone == phone))
+        .limit(1)
+    ).first()
+    if row is None:
+        return None
+    return "Email" if row.Email == email else "Phone"
+
+
+def register_user(db: Session, user: schemas.UserCreate):
+    """Register a user with a single INSERT.
+
+    Raises ValueError when the email or phone is already registered,
+    whether caught by the pre-check or by the unique constraints when two
+    registrations race.
+    """
+    identities = _identity_filter
+    if (identities is None or identities.saturated) and _added_during_build is None:
+        build_identity_filter_in_background(db.get_bind())
+    keys = _identity_keys(user.Email, user.Phone)
+    if identities is None or any(identities.might_contain(key) for key in keys):
+        field = _taken_field(db, user.Email, user.Phone)
+        if field:
+            raise ValueError(f"{field} already registered")
+
+    try:
+        db_user = create_user(db, user)
+    except IntegrityError as e:
+        db.rollback()
+        message = str(e.orig)
+        if "Email" in message:
+            raise ValueError("Email already registered") from e
+        if "Phone" in message:
+            raise ValueError("Phone already registered") from e
+        raise
+
+    with _identity_filter_lock:
+        for key in keys:
+            if _identity_filter is not None:
+                _identity_filter.add(key)
+            if _added_during_build is not None:
+                _added_during_build.append(key)
+    return db_user
+
 def delete_user(db: Session, user_id: int):
     """Delete a user and related profiles (employee/doctor/patient)"""
     user = db.query(models.User).filter(models.User.UserID == user_id).first()
@@ -65,9 +174,31 @@ def delete_user(db: Session, user_id: int):
 
     # Finally delete the user
     db.delete(user)
+    for cache_name in ("user", "employee_profile", "doctor_profile", "patient_profile"):
+        publish(db, cache_name, user_id)
     db.commit()
     return True
 
 def get_user_by_id(db: Session, user_id: int):
     """Fetch only the user table details by UserID."""
-    return db.query(models.User).filter(models.User.UserID == user_id).first()
\ No newline at end of file
+    return db.query(models.User).filter(models.User.UserID == user_id).first()
+
+def get_users_with_profiles(db: Session, user_ids: list[int]):
+    """Fetch many users with their doctor/patient/employee profiles in one query.
+
+    Returns (users in the requested order, requested IDs that don't exist).
+    """
+    users = (
+        db.query(models.User)
+        .options(
+            joinedload(models.User.doctor),
+            joinedload(models.User.patient),
+            joinedload(models.User.employee),
+        )
+        .filter(models.User.UserID.in_(user_ids))
+        .all()
+    )
+    by_id = {u.UserID: u for u in users}
+    found = [by_id[i] for i in user_ids if i in by_id]
+    missing = [i for i in user_ids if i not in by_id]
+    return found, missing
@@ -1,20 +1,182 @@
-from sqlalchemy import create_engine
+import itertools
+import re
+import threading
+from time import monotonic, time
+from fastapi import Request
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-
-DATABASE_URL = os.getenv("DATABASE_URL")
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.elements import TextClause
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.config import (
+    DATABASE_URL, REPLICA_URLS, REPLICA_MAX_LAG_SECONDS, REPLICA_HEALTH_INTERVAL_SECONDS,
+    REPLICA_READ_AFTER_WRITE_SECONDS
+)
 
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+
+# -------- Read replica routing --------
+_PG_LAG_SQL = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+
+def replica_lag(conn):
+    """Seconds the replica is behind its primary (0 for non-Postgres DBs)."""
+    if conn.dialect.name == "postgresql":
+        return float(conn.execute(_PG_LAG_SQL).scalar() or 0)
+    conn.execute(text("SELECT 1"))
+    return 0.0
+
+
+class ReplicaPool:
+    """Round-robin over replica engines, skipping unhealthy or lagging ones.
+
+    Each replica is probed at most once per `check_interval`; a replica that
+    fails the probe or lags more than `max_lag` seconds is skipped until the
+    next probe says otherwise.
+    """
+
+    def __init__(self, engines, max_lag=REPLICA_MAX_LAG_SECONDS,
+                 check_interval=REPLICA_HEALTH_INTERVAL_SECONDS):
+        self.engines = list(engines)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._cycle = itertools.count()
+        self._status = {}  # engine -> (healthy, checked_at)
+        self._lock = threading.Lock()
+
+    def _probe(self, replica):
+        try:
+            with replica.connect() as conn:
+                return replica_lag(conn) <= self.max_lag
+        except Exception:
+            return False
+
+    def is_healthy(self, replica):
+        with self._lock:
+            healthy, checked_at = self._status.get(replica, (False, None))
+            if checked_at is not None and monotonic() - checked_at < self.check_interval:
+                return healthy
+        healthy = self._probe(replica)
+        with self._lock:
+            self._status[replica] = (healthy, monotonic())
+        return healthy
+
+    def pick(self):
+        """Next healthy replica, or None when all are down or lagging."""
+        count = len(self.engines)
+        start = next(self._cycle)
+        for offset in range(count):
+            replica = self.engines[(start + offset) % count]
+            if self.is_healthy(replica):
+                return replica
+        return None
+
+
+_SELECT = re.compile(r"^\s*select\b", re.IGNORECASE)
+_LOCKING_CLAUSE = re.compile(r"\bfor\s+(no\s+key\s+update|update|share|key\s+share)\b", re.IGNORECASE)
+
+
+def _is_read(clause):
+    """True for plain SELECTs, ORM-built or `text()`; locking reads need the primary."""
+    if isinstance(clause, TextClause):
+        return bool(_SELECT.match(clause.text)) and not _LOCKING_CLAUSE.search(clause.text)
+    return getattr(clause, "is_select", False) and getattr(clause, "_for_update_arg", None) is None
+
+
+class RoutingSession(Session):
+    """Session that reads from a replica until it writes.
+
+    The first flush or non-SELECT statement pins the session to the primary,
+    so a request always reads its own writes. A session created with
+    `pinned=True` uses the primary from the start. Without a usable replica
+    every statement goes to the primary.
+    """
+
+    def __init__(self, primary, replicas=None, pinned=False, **kwargs):
+        super().__init__(**kwargs)
+        self.primary = primary
+        self.replicas = replicas
+        self.replica = None
+        self.pinned = pinned
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or (clause is not None and not _is_read(clause)):
+            self.pinned = True
+        if self.pinned or not self.replicas:
+            return self.primary
+        if self.replica is None:
+            self.replica = self.replicas.pick() or self.primary
+        return self.replica
+
+
+def create_routing_sessionmaker(primary, replicas, **pool_options):
+    """Build a sessionmaker whose sessions route reads across `replicas`."""
+    pool = ReplicaPool(replicas, **pool_options) if replicas else None
+    return sessionmaker(class_=RoutingSession, primary=primary, replicas=pool,
+                        autocommit=False, autoflush=False)
+
+
+replica_engines = [create_engine(url) for url in REPLICA_URLS]
+ReadSessionLocal = create_routing_sessionmaker(engine, replica_engines)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+# -------- Read-after-write window --------
+LAST_WRITE_COOKIE = "last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class LastWriteMiddleware(BaseHTTPMiddleware):
+    """Stamp successful writes with their time, as a cookie and a response header.
+
+    Clients send the stamp back (browsers do it with the cookie; other
+    clients echo the header), and `get_read_db` serves them from the primary
+    for REPLICA_READ_AFTER_WRITE_SECONDS so a read right after a POST sees it.
+    """
+
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        if request.method in WRITE_METHODS and response.status_code < 400:
+            stamp = f"{time():.3f}"
+            response.headers[LAST_WRITE_HEADER] = stamp
+            response.set_cookie(LAST_WRITE_COOKIE, stamp, max_age=int(REPLICA_READ_AFTER_WRITE_SECONDS) + 1,
+                                httponly=True, samesite="lax")
+        return response
+
+
+def wrote_recently(request: Request) -> bool:
+    stamp = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        return time() - float(stamp) < REPLICA_READ_AFTER_WRITE_SECONDS
+    except (TypeError, ValueError):
+        return False
+
+
+def get_read_db(request: Request):
+    """Session for read-only endpoints; served by a replica when one is healthy.
+
+    Clients that wrote within REPLICA_READ_AFTER_WRITE_SECONDS read from the
+    primary instead, so they see their own writes.
+    """
+    db = ReadSessionLocal(pinned=wrote_recently(request))
+    try:
+        yield db
+    finally:
+        db.close()
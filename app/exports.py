@@ -0,0 +1,158 @@
+"""Streaming CSV/Parquet exports of appointments, billing and attendance.
+
+Rows come from a server-side cursor (`yield_per`) in EXPORT_BATCH_SIZE
+batches, so memory stays constant however many rows match.
+
+    python -m app.exports appointments 2025-01-01 2025-01-31 --format parquet -o jan.parquet
+"""
+import csv
+import io
+import os
+import tempfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from sqlalchemy import DECIMAL, Boolean, Date, DateTime, Float, Integer, select
+from sqlalchemy.orm import Session
+from app import models
+from app.core.config import EXPORT_BATCH_SIZE
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet exports are optional
+    pa = pq = None
+
+# dataset -> (model, date column used for the range filter)
+DATASETS = {
+    "appointments": (models.Appointment, models.Appointment.DateTime),
+    "billing": (models.Billing, models.Billing.Date),
+    "attendance": (models.Attendance, models.Attendance.Date),
+}
+FORMATS = ("csv", "parquet")
+
+
+def _columns(dataset: str):
+    model, _ = DATASETS[dataset]
+    return list(model.__table__.columns)
+
+
+def iter_batches(db: Session, dataset: str, start: date, end: date, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yield lists of row tuples with start <= date column <= end, in primary key order."""
+    model, column = DATASETS[dataset]
+    if isinstance(column.type, DateTime):
+        low, high = datetime.combine(start, time.min), datetime.combine(end + timedelta(days=1), time.min)
+    else:
+        low, high = start, end + timedelta(days=1)
+
+    primary_key = list(model.__table__.primary_key.columns)
+    stmt = (
+        select(*_columns(dataset))
+        .where(column >= low, column < high)
+        .order_by(*primary_key)
+        .execution_options(yield_per=batch_size)
+    )
+    for rows in db.execute(stmt).partitions():
+        yield rows
+
+
+def iter_csv(db: Session, dataset: str, start: date, end: date, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yield encoded CSV chunks: the header, then one chunk per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in _columns(dataset)])
+    for rows in iter_batches(db, dataset, start, end, batch_size):
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _arrow_type(column):
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column.type, Date):
+        return pa.date32()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, (Float, DECIMAL)):
+        return pa.float64()
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    return pa.string()
+
+
+def _arrow_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (dict, list)):
+        return str(value)
+    return value
+
+
+def write_parquet(db: Session, dataset: str, start: date, end: date, path: str,
+                  batch_size: int = EXPORT_BATCH_SIZE):
+    """Write the export to `path`, one Parquet row group per batch."""
+    if pq is None:
+        raise RuntimeError("pyarrow is required for Parquet exports")
+    columns = _columns(dataset)
+    schema = pa.schema([(column.name, _arrow_type(column)) for column in columns])
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for rows in iter_batches(db, dataset, start, end, batch_size):
+            arrays = [
+                pa.array([_arrow_value(row[i]) for row in rows], type=schema.field(i).type)
+                for i in range(len(columns))
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
+def iter_parquet(db: Session, dataset: str, start: date, end: date,
+                 batch_size: int = EXPORT_BATCH_SIZE, chunk_size: int = 1024 * 1024):
+    """Yield the Parquet file in chunks.
+
+    Parquet puts its footer after the last row group, so the file is built
+    in a temporary file (row group by row group) and then streamed out.
+    """
+    fd, path = tempfile.mkstemp(suffix=".parquet")
+    os.close(fd)
+    try:
+        write_parquet(db, dataset, start, end, path, batch_size)
+        with open(path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+def main():
+    import argparse
+    import sys
+    from app.database import ReadSessionLocal
+
+    parser = argparse.ArgumentParser(description="Export rows in a date range")
+    parser.add_argument("dataset", choices=sorted(DATASETS))
+    parser.add_argument("start", type=date.fromisoformat)
+    parser.add_argument("end", type=date.fromisoformat)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("-o", "--output", help="file to write (default: stdout, CSV only)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with ReadSessionLocal() as db:
+        if args.format == "parquet":
+            if not args.output:
+                parser.error("--output is required for Parquet")
+            write_parquet(db, args.dataset, args.start, args.end, args.output, args.batch_size)
+            return
+        out = open(args.output, "wb") if args.output else sys.stdout.buffer
+        try:
+            for chunk in iter_csv(db, args.dataset, args.start, args.end, args.batch_size):
+                out.write(chunk)
+        finally:
+            if args.output:
+                out.close()
+
+
+if __name__ == "__main__":
+    main()
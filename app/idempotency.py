@@ -0,0 +1,184 @@
+"""`Idempotency-Key` support for write endpoints.
+
+The first POST/PUT/PATCH carrying a key claims it by inserting a row into
+IdempotencyKeys. The primary key makes that claim atomic across workers
+and hosts. When the request finishes, its response is stored
+zlib-compressed on the row for IDEMPOTENCY_TTL_SECONDS, and a retry with
+the same key replays it. A duplicate that arrives while the first is still
+running polls the row until the response is stored (for at most
+IDEMPOTENCY_WAIT_SECONDS, then 409) instead of executing again. Reusing a
+key with a different body is rejected with 422. Responses with status
+>= 500 are not stored, so the client can retry them.
+
+A key is identified by its value, method and path, plus the X-User-ID
+header when one is sent. Nothing depends on the client's address, so a
+phone that retries from a new network still finds its key. The body
+fingerprint keeps another client that reuses a key with a different
+request from being served its stored response.
+
+A claim whose worker died is taken over once IDEMPOTENCY_LOCK_SECONDS
+have passed. Every claim is stamped with its CreatedAt, and `complete` and
+`release` only touch the row while it still carries that stamp. A worker
+that lost its claim to a takeover can't overwrite or delete the new
+owner's row. Expired rows are deleted every IDEMPOTENCY_PRUNE_SECONDS.
+"""
+import asyncio
+import hashlib
+import zlib
+from datetime import datetime, timedelta
+from time import monotonic
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, Response
+from app import models
+from app.audit import ACTOR_HEADER
+from app.database import engine
+from app.core.config import (
+    IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_LOCK_SECONDS, IDEMPOTENCY_WAIT_SECONDS,
+    IDEMPOTENCY_POLL_SECONDS, IDEMPOTENCY_PRUNE_SECONDS,
+)
+
+HEADER = "Idempotency-Key"
+METHODS = {"POST", "PUT", "PATCH"}
+
+
+class IdempotencyStore:
+    """IdempotencyKeys rows: a claim while the request runs, then its stored response."""
+
+    def __init__(self, engine, ttl=IDEMPOTENCY_TTL_SECONDS, lock_seconds=IDEMPOTENCY_LOCK_SECONDS,
+                 prune_seconds=IDEMPOTENCY_PRUNE_SECONDS):
+        self.engine = engine
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self.prune_seconds = prune_seconds
+        self._next_prune = 0.0
+
+    def claim(self, key_hash: str, fingerprint: str):
+        """Try to claim a key.
+
+        Returns ("claimed", claimed_at), ("running", row), ("done", row) or
+        ("mismatch", None) when the key was used with a different body;
+        `claimed_at` must be passed back to `complete` or `release`.
+        """
+        table = models.IdempotencyKey
+        while True:
+            now = datetime.utcnow()
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(insert(table).values(
+                        KeyHash=key_hash, Fingerprint=fingerprint, Status="running",
+                        CreatedAt=now, ExpiresAt=now + timedelta(seconds=self.lock_seconds),
+                    ))
+                self._maybe_prune()
+                return "claimed", now
+            except IntegrityError:
+                pass
+
+            with self.engine.begin() as conn:
+                row = conn.execute(select(table).where(table.KeyHash == key_hash)).first()
+                if row is None:
+                    continue  # released or pruned in between; claim again
+                if row.ExpiresAt < now:
+                    # Expired response, or a claim whose worker died: drop it and claim again
+                    conn.execute(delete(table).where(
+                        table.KeyHash == key_hash, table.ExpiresAt == row.ExpiresAt))
+                    continue
+            if row.Fingerprint != fingerprint:
+                return "mismatch", None
+            return row.Status, row
+
+    def complete(self, key_hash: str, claimed_at: datetime, status_code: int, headers: list, body: bytes):
+        """Store the response; returns False if the claim was taken over meanwhile."""
+        table = models.IdempotencyKey
+        with self.engine.begin() as conn:
+            return conn.execute(update(table).where(
+                table.KeyHash == key_hash, table.CreatedAt == claimed_at, table.Status == "running",
+            ).values(
+                Status="done", StatusCode=status_code, Body=zlib.compress(body),
+                Headers=[[name.decode("latin-1"), value.decode("latin-1")] for name, value in headers],
+                ExpiresAt=datetime.utcnow() + timedelta(seconds=self.ttl),
+            )).rowcount == 1
+
+    def release(self, key_hash: str, claimed_at: datetime):
+        """Drop our claim so the request can be retried."""
+        table = models.IdempotencyKey
+        with self.engine.begin() as conn:
+            conn.execute(delete(table).where(
+                table.KeyHash == key_hash, table.CreatedAt == claimed_at, table.Status == "running"))
+
+    def prune(self):
+        table = models.IdempotencyKey
+        with self.engine.begin() as conn:
+            return conn.execute(delete(table).where(table.ExpiresAt < datetime.utcnow())).rowcount
+
+    def _maybe_prune(self):
+        if monotonic() >= self._next_prune:
+            self._next_prune = monotonic() + self.prune_seconds
+            self.prune()
+
+
+store = IdempotencyStore(engine)
+
+
+def _key_hash(request, idempotency_key: str) -> str:
+    parts = (request.headers.get(ACTOR_HEADER, ""), idempotency_key, request.method, request.url.path)
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def _build_response(status_code: int, headers: list, content: bytes, background=None):
+    response = Response(content=content, status_code=status_code, background=background)
+    response.raw_headers = headers + [(b"content-length", str(len(content)).encode())]
+    return response
+
+
+def _replay(row):
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in row.Headers]
+    headers.append((b"idempotent-replayed", b"true"))
+    return _build_response(row.StatusCode, headers, zlib.decompress(row.Body))
+
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        idempotency_key = request.headers.get(HEADER)
+        if request.method not in METHODS or not idempotency_key:
+            return await call_next(request)
+
+        body = await request.body()
+        fingerprint = hashlib.sha256(body).hexdigest()
+        key_hash = _key_hash(request, idempotency_key)
+
+        deadline = monotonic() + IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            state, row = await run_in_threadpool(store.claim, key_hash, fingerprint)
+            if state == "claimed":
+                claimed_at = row
+                break
+            if state == "mismatch":
+                return JSONResponse(
+                    status_code=422,
+                    content={"detail": f"{HEADER} was already used with a different request"},
+                )
+            if state == "done":
+                return _replay(row)
+            if monotonic() >= deadline:
+                return JSONResponse(
+                    status_code=409,
+                    content={"detail": f"A request with this {HEADER} is still in progress"},
+                )
+            await asyncio.sleep(IDEMPOTENCY_POLL_SECONDS)
+
+        try:
+            response = await call_next(request)
+            content = b"".join([chunk async for chunk in response.body_iterator])
+        except BaseException:
+            await run_in_threadpool(store.release, key_hash, claimed_at)
+            raise
+
+        headers = [(name, value) for name, value in response.raw_headers if name != b"content-length"]
+        if response.status_code < 500:
+            await run_in_threadpool(store.complete, key_hash, claimed_at, response.status_code, headers, content)
+        else:
+            await run_in_threadpool(store.release, key_hash, claimed_at)  # later retries run again
+        return _build_response(response.status_code, headers, content, response.background)
@@ -0,0 +1,51 @@
+import importlib
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.orm import Session
+from app import models
+from app.core.config import JOB_MODULES
+
+# name -> (handler, default queue)
+_registry = {}
+
+
+def job(name: str, queue: str = "default"):
+    """Register `handler(payload: dict)` as a background job called `name`."""
+    def decorator(handler):
+        _registry[name] = (handler, queue)
+        return handler
+    return decorator
+
+
+def import_job_modules():
+    """Import JOB_MODULES so their @job handlers are registered in this process."""
+    for module in JOB_MODULES:
+        importlib.import_module(module)
+
+
+def get_handler(name: str):
+    if name not in _registry:
+        raise LookupError(f"No job registered as {name!r}")
+    return _registry[name][0]
+
+
+def enqueue(db: Session, name: str, payload: Optional[dict] = None, queue: Optional[str] = None,
+            run_at: Optional[datetime] = None, delay: Optional[timedelta] = None, max_attempts: int = 5):
+    """Add a job to the caller's session.
+
+    Nothing is committed here: the job becomes visible to workers when the
+    caller commits, so it lands atomically with the write that caused it.
+    Raises LookupError for a name no @job handler is registered under, so a
+    typo or a module missing from JOB_MODULES fails at enqueue time instead
+    of in the worker.
+    """
+    if name not in _registry:
+        raise LookupError(f"No job registered as {name!r}")
+    if queue is None:
+        queue = _registry[name][1]
+    if run_at is None:
+        run_at = datetime.utcnow() + (delay or timedelta())
+    new_job = models.Job(Name=name, Payload=payload or {}, Queue=queue, RunAt=run_at,
+                         MaxAttempts=max_attempts)
+    db.add(new_job)
+    return new_job
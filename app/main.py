@@ -1,12 +1,29 @@
+import logging
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import Base, engine
-from app.routers import auth, doctor, employee, patient
+from fastapi.middleware.gzip import GZipMiddleware
+from app.database import Base, LastWriteMiddleware, engine
+from app import cache, coalesce, jobs, migrations, partitioning
+from app.audit import audit_log
+from app.crud import users as crud_users
+from app.idempotency import IdempotencyMiddleware
+from app.walkin import cancel_stale_tokens
+from app.routers import auth, doctor, employee, exports, patient, walkin
 
-# Create database tables
+logger = logging.getLogger(__name__)
+
+# Register @job handlers so jobs.enqueue knows every job's queue
+jobs.import_job_modules()
+
+# Add columns/indexes to existing tables, then create any missing tables
+migrations.upgrade(engine)
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Healthcare Automation Backend")
+app = FastAPI(
+    title="Healthcare Automation Backend",
+    default_response_class=ORJSONResponse,
+)
 
 origins = [
     "https://health-automation-landing.web.app",
@@ -19,6 +36,11 @@ origins = [
     "http://127.0.0.1:3001",
 ]
 
+app.add_middleware(IdempotencyMiddleware)
+
+# Outside idempotency, so replayed writes get a fresh read-after-write stamp
+app.add_middleware(LastWriteMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -27,12 +49,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so idempotent replays are stored uncompressed and encoded per request
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # Register routers
 app.include_router(auth.router)
 app.include_router(doctor.router)
 app.include_router(patient.router)
 app.include_router(employee.router)
+app.include_router(exports.router)
+app.include_router(walkin.router)
+
+@app.on_event("startup")
+def create_upcoming_partitions():
+    # Cron runs the same maintenance, so a failure here must not stop the API from starting
+    try:
+        partitioning.ensure_upcoming_partitions(engine)
+    except Exception:
+        logger.exception("Could not create upcoming Attendance partitions")
+
+@app.on_event("startup")
+def load_registration_filter():
+    crud_users.build_identity_filter_in_background(engine)
+
+@app.on_event("startup")
+def start_cache_invalidation():
+    cache.start_subscriber(engine)
+
+@app.on_event("shutdown")
+def stop_cache_invalidation():
+    cache.stop_subscriber()
+
+@app.on_event("startup")
+def start_audit_flusher():
+    audit_log.start()
+
+@app.on_event("shutdown")
+def flush_audit_log():
+    audit_log.stop()
+
+@app.on_event("startup")
+def cancel_stale_walkin_tokens():
+    cancel_stale_tokens(engine)
 
 @app.get("/")
 def root():
-    return {"message": "Healthcare backend is running!"}
\ No newline at end of file
+    return {"message": "Healthcare backend is running!"}
+
+@app.get("/metrics/coalescing")
+def coalescing_metrics():
+    """Per-group counts of shared (suppressed) versus executed reads"""
+    return coalesce.metrics()
\ No newline at end of file
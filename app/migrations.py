@@ -0,0 +1,79 @@
+"""Schema changes that `Base.metadata.create_all` can't make on existing tables.
+
+`create_all` only creates missing tables, so columns and indexes added to
+tables that already exist are applied here. Every step is idempotent; the
+app runs `upgrade` on startup and it can also be run by hand:
+
+    python -m app.migrations
+"""
+from datetime import datetime
+from sqlalchemy import inspect, text
+
+# Delta sync watermark (see crud.patient.get_patient_changes)
+UPDATED_AT_TABLES = ("PatientProfiles", "Appointments", "Consultations", "InvestigationBookings", "Reports")
+
+# (table, columns) of indexes added to existing tables; named ix_<table>_<columns>
+# like the models' `index=True` and Index() declarations
+INDEXES = (
+    ("Appointments", ("DateTime",)),
+    ("Attendance", ("Date",)),
+    # Patient timeline (crud.patient.get_patient_timeline) and its selectinloads
+    ("Appointments", ("PatientID", "DateTime")),
+    ("Consultations", ("AppointmentID",)),
+    ("InvestigationBookings", ("AppointmentID",)),
+    ("Billing", ("AppointmentID",)),
+    ("Reports", ("BookingID",)),
+    # Delta sync (crud.patient.get_patient_changes)
+    ("Appointments", ("PatientID", "UpdatedAt")),
+) + tuple((table, ("UpdatedAt",)) for table in UPDATED_AT_TABLES)
+
+# Arbitrary constant so concurrent workers run the upgrade one at a time
+_ADVISORY_LOCK_ID = 73120038
+
+
+def _column_type(conn):
+    return "TIMESTAMP WITHOUT TIME ZONE" if conn.dialect.name == "postgresql" else "DATETIME"
+
+
+def add_updated_at(conn):
+    """Add and backfill UpdatedAt on the synced tables; returns the tables changed."""
+    inspector = inspect(conn)
+    existing = set(inspector.get_table_names())
+    changed = []
+    for table in UPDATED_AT_TABLES:
+        if table not in existing:
+            continue  # create_all will build it with the column
+        if any(c["name"] == "UpdatedAt" for c in inspector.get_columns(table)):
+            continue
+        conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN "UpdatedAt" {_column_type(conn)}'))
+        # Rows predating the column count as changed now, so the next sync sends them once
+        conn.execute(text(f'UPDATE "{table}" SET "UpdatedAt" = :now WHERE "UpdatedAt" IS NULL'),
+                     {"now": datetime.utcnow()})
+        changed.append(table)
+    return changed
+
+
+def create_indexes(conn):
+    existing = set(inspect(conn).get_table_names())
+    for table, columns in INDEXES:
+        if table in existing:
+            name = f"ix_{table}_{'_'.join(columns)}"
+            column_list = ", ".join(f'"{column}"' for column in columns)
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({column_list})'))
+
+
+def upgrade(engine):
+    """Bring an existing database up to the current models, in one transaction."""
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _ADVISORY_LOCK_ID})
+        changed = add_updated_at(conn)
+        create_indexes(conn)
+    return changed
+
+
+if __name__ == "__main__":
+    from app.database import engine
+
+    changed = upgrade(engine)
+    print(f"Added UpdatedAt to: {', '.join(changed)}" if changed else "Schema is up to date")
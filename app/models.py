@@ -1,7 +1,8 @@
 from sqlalchemy import (
     Column, Integer, String, Text, Date, DateTime, Boolean, Float, DECIMAL,
-    ForeignKey, JSON
+    ForeignKey, JSON, Index, LargeBinary
 )
+from sqlalchemy import DDL, event, literal, select
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -58,6 +59,7 @@ class PatientProfile(Base):
     RiskCategory = Column(String)
     FamilyHistory = Column(Text)
     Lifestyle = Column(Text)
+    UpdatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     user = relationship("User", back_populates="patient")
     appointments = relationship("Appointment", back_populates="patient")
@@ -104,28 +106,40 @@ class Employee(Base):
 
 class Appointment(Base):
     __tablename__ = "Appointments"
+    __table_args__ = (
+        # Patient timeline: one patient's appointments, newest first
+        Index("ix_Appointments_PatientID_DateTime", "PatientID", "DateTime"),
+        # Delta sync: one patient's appointments changed since the watermark
+        Index("ix_Appointments_PatientID_UpdatedAt", "PatientID", "UpdatedAt"),
+    )
 
     AppointmentID = Column(Integer, primary_key=True, index=True)
     PatientID = Column(Integer, ForeignKey("PatientProfiles.PatientID"))
     DoctorID = Column(Integer, ForeignKey("DoctorProfiles.DoctorID"))
-    DateTime = Column(DateTime)
+    # Declared before the DateTime column, which shadows the DateTime type below it
+    UpdatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    DateTime = Column(DateTime, index=True)
     Type = Column(String)
     Status = Column(String)
 
     patient = relationship("PatientProfile",back_populates="appointments")
     doctor = relationship("DoctorProfile", back_populates="appointments")
+    consultations = relationship("Consultation", back_populates="appointment")
+    bookings = relationship("InvestigationBooking", back_populates="appointment")
+    bills = relationship("Billing", back_populates="appointment")
 
 
 class Consultation(Base):
     __tablename__ = "Consultations"
 
     ConsultationID = Column(Integer, primary_key=True, index=True)
-    AppointmentID = Column(Integer, ForeignKey("Appointments.AppointmentID"))
+    AppointmentID = Column(Integer, ForeignKey("Appointments.AppointmentID"), index=True)
     Notes = Column(Text)
     PrescriptionFile = Column(Text)
     FollowUpRequired = Column(Boolean)
+    UpdatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
-    appointment = relationship("Appointment")
+    appointment = relationship("Appointment", back_populates="consultations")
 
 # =========================
 # 4️⃣  Labs, Investigations & Reports
@@ -156,26 +170,29 @@ class InvestigationBooking(Base):
     __tablename__ = "InvestigationBookings"
 
     BookingID = Column(Integer, primary_key=True, index=True)
-    AppointmentID = Column(Integer, ForeignKey("Appointments.AppointmentID"))
+    AppointmentID = Column(Integer, ForeignKey("Appointments.AppointmentID"), index=True)
     InvestigationID = Column(Integer, ForeignKey("Investigations.InvestigationID"))
     LabID = Column(Integer, ForeignKey("LabCenters.LabID"))
     Status = Column(String)
     ResultDate = Column(Date)
+    UpdatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
-    appointment = relationship("Appointment")
+    appointment = relationship("Appointment", back_populates="bookings")
     investigation = relationship("Investigation")
     lab = relationship("LabCenter")
+    reports = relationship("Report", back_populates="booking")
 
 
 class Report(Base):
     __tablename__ = "Reports"
 
     ReportID = Column(Integer, primary_key=True, index=True)
-    BookingID = Column(Integer, ForeignKey("InvestigationBookings.BookingID"))
+    BookingID = Column(Integer, ForeignKey("InvestigationBookings.BookingID"), index=True)
     FilePath = Column(Text)
     AbnormalFlag = Column(Boolean)
+    UpdatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
-    booking = relationship("InvestigationBooking")
+    booking = relationship("InvestigationBooking", back_populates="reports")
 
 # =========================
 # 5️⃣  Billing & Payments
@@ -206,14 +223,14 @@ class Billing(Base):
     __tablename__ = "Billing"
 
     BillID = Column(Integer, primary_key=True, index=True)
-    AppointmentID = Column(Integer, ForeignKey("Appointments.AppointmentID"))
+    AppointmentID = Column(Integer, ForeignKey("Appointments.AppointmentID"), index=True)
     PaymentID = Column(Integer, ForeignKey("Payments.PaymentID"))
     DiscountID = Column(Integer, ForeignKey("Discounts.DiscountID"))
     Amount = Column(DECIMAL)
     FinalAmount = Column(DECIMAL)
     Date = Column(DateTime, default=datetime.utcnow)
 
-    appointment = relationship("Appointment")
+    appointment = relationship("Appointment", back_populates="bills")
     payment = relationship("Payment")
     discount = relationship("Discount")
 
@@ -226,7 +243,7 @@ class Attendance(Base):
 
     AttendanceID = Column(Integer, primary_key=True, index=True)
     UserID = Column(Integer, ForeignKey("Users.UserID"))
-    Date = Column(Date)
+    Date = Column(Date, index=True)
     InTime = Column(DateTime)
     OutTime = Column(DateTime)
     Latitude = Column(Float)
@@ -234,3 +251,147 @@ class Attendance(Base):
     Remarks = Column(Text)
 
     user = relationship("User")
+
+# =========================
+# 7️⃣  Mobile Sync Tombstones
+# =========================
+
+class SyncTombstone(Base):
+    __tablename__ = "SyncTombstones"
+    __table_args__ = (Index("ix_SyncTombstones_PatientID_DeletedAt", "PatientID", "DeletedAt"),)
+
+    TombstoneID = Column(Integer, primary_key=True, index=True)
+    Entity = Column(String, nullable=False)
+    EntityID = Column(Integer, nullable=False)
+    PatientID = Column(Integer, nullable=False)
+    DeletedAt = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+def _record_tombstone(entity, id_column, patient_query):
+    """Write a SyncTombstone in the same transaction whenever `entity` is deleted."""
+    def after_delete(mapper, connection, target):
+        patient_id = connection.execute(patient_query(target)).scalar()
+        if patient_id is not None:
+            connection.execute(SyncTombstone.__table__.insert().values(
+                Entity=entity.__name__, EntityID=getattr(target, id_column),
+                PatientID=patient_id, DeletedAt=datetime.utcnow(),
+            ))
+    event.listen(entity, "after_delete", after_delete)
+
+
+_record_tombstone(PatientProfile, "PatientID", lambda t: select(literal(t.PatientID)))
+_record_tombstone(Appointment, "AppointmentID", lambda t: select(literal(t.PatientID)))
+_record_tombstone(Consultation, "ConsultationID", lambda t: select(Appointment.PatientID).where(
+    Appointment.AppointmentID == t.AppointmentID))
+_record_tombstone(InvestigationBooking, "BookingID", lambda t: select(Appointment.PatientID).where(
+    Appointment.AppointmentID == t.AppointmentID))
+_record_tombstone(Report, "ReportID", lambda t: select(Appointment.PatientID).join(
+    InvestigationBooking, InvestigationBooking.AppointmentID == Appointment.AppointmentID
+).where(InvestigationBooking.BookingID == t.BookingID))
+
+# =========================
+# 8️⃣  Walk-in Queue
+# =========================
+
+class WalkInCounter(Base):
+    __tablename__ = "WalkInCounters"
+
+    QueueKey = Column(String, primary_key=True)
+    ServiceDate = Column(Date, primary_key=True)
+    LastNumber = Column(Integer, nullable=False, default=0)
+
+
+class WalkInToken(Base):
+    __tablename__ = "WalkInTokens"
+    __table_args__ = (
+        Index("ix_WalkInTokens_Queue_Date_Number", "QueueKey", "ServiceDate", "TokenNumber", unique=True),
+        # Serving order: the first waiting row in this index is the next patient
+        Index("ix_WalkInTokens_Queue_Date_Status_Priority",
+              "QueueKey", "ServiceDate", "Status", "Priority", "TokenNumber"),
+    )
+
+    TokenID = Column(Integer, primary_key=True, index=True)
+    QueueKey = Column(String, nullable=False)  # "doctor-<DoctorID>" or "ward-<Ward>"
+    ServiceDate = Column(Date, nullable=False)
+    TokenNumber = Column(Integer, nullable=False)
+    PatientID = Column(Integer, ForeignKey("PatientProfiles.PatientID"), nullable=False)
+    RiskCategory = Column(String)
+    Priority = Column(Float, nullable=False)  # arrival epoch seconds less the risk boost; lower goes first
+    Status = Column(String, nullable=False, default="waiting")  # waiting, called, completed, cancelled
+    ArrivedAt = Column(DateTime, nullable=False)
+    CalledAt = Column(DateTime)
+    CompletedAt = Column(DateTime)
+
+# =========================
+# 9️⃣  Background Jobs
+# =========================
+
+class Job(Base):
+    __tablename__ = "Jobs"
+    __table_args__ = (Index("ix_Jobs_Status_Queue_RunAt", "Status", "Queue", "RunAt"),)
+
+    JobID = Column(Integer, primary_key=True, index=True)
+    Queue = Column(String, nullable=False, default="default")
+    Name = Column(String, nullable=False)
+    Payload = Column(JSON)
+    Status = Column(String, nullable=False, default="queued")  # queued, running, done, failed
+    Attempts = Column(Integer, nullable=False, default=0)
+    MaxAttempts = Column(Integer, nullable=False, default=5)
+    RunAt = Column(DateTime, nullable=False, default=datetime.utcnow)
+    LockedAt = Column(DateTime)
+    LastError = Column(Text)
+    CreatedAt = Column(DateTime, default=datetime.utcnow)
+    UpdatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class CacheInvalidation(Base):
+    __tablename__ = "CacheInvalidations"
+    # Never reuse sequence numbers on SQLite, even after pruning empties the table
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    Seq = Column(Integer, primary_key=True, index=True)
+    Cache = Column(String, nullable=False)
+    Key = Column(String)  # NULL clears the whole cache
+    CreatedAt = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "IdempotencyKeys"
+
+    # sha256 of (client scope, Idempotency-Key, method, path)
+    KeyHash = Column(String(64), primary_key=True)
+    Fingerprint = Column(String(64), nullable=False)  # sha256 of the request body
+    Status = Column(String, nullable=False, default="running")  # running, done
+    StatusCode = Column(Integer)
+    Headers = Column(JSON)
+    Body = Column(LargeBinary)  # zlib-compressed response body
+    CreatedAt = Column(DateTime, nullable=False, default=datetime.utcnow)
+    ExpiresAt = Column(DateTime, nullable=False, index=True)
+
+# =========================
+# 🔟  Access Audit
+# =========================
+
+class AccessAudit(Base):
+    __tablename__ = "AccessAudit"
+
+    AuditID = Column(Integer, primary_key=True, index=True)
+    # No foreign keys: audit rows must outlive the users they mention
+    ActorID = Column(Integer, index=True)
+    ClientIP = Column(String)
+    Resource = Column(String, nullable=False)
+    SubjectID = Column(Integer, index=True)
+    Action = Column(String, nullable=False, default="read")
+    AccessedAt = Column(DateTime, nullable=False, index=True)
+
+
+# Append-only on Postgres: reject UPDATE and DELETE at the database level
+event.listen(AccessAudit.__table__, "after_create", DDL("""
+CREATE OR REPLACE FUNCTION access_audit_append_only() RETURNS trigger AS $$
+BEGIN
+    RAISE EXCEPTION 'AccessAudit is append-only';
+END;
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER access_audit_append_only BEFORE UPDATE OR DELETE ON "AccessAudit"
+    FOR EACH ROW EXECUTE FUNCTION access_audit_append_only();
+""").execute_if(dialect="postgresql"))
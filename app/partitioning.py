@@ -0,0 +1,258 @@
+"""Monthly range partitioning and Parquet archiving for Attendance (Postgres).
+
+Run `python -m app.partitioning migrate` once to convert the Attendance
+table, then `python -m app.partitioning maintain` from cron to create
+upcoming partitions and archive months older than the retention horizon.
+
+Appointments are not partitioned: Consultations, InvestigationBookings and
+Billing reference Appointments.AppointmentID, and Postgres only allows a
+unique key on a partitioned table if it includes the partition column.
+Its hot-path queries are served by the index on Appointments.DateTime.
+"""
+import itertools
+import os
+import re
+from datetime import date
+from sqlalchemy import text
+from app.core.config import (
+    ARCHIVE_DIR, ARCHIVE_READ_LIMIT, ATTENDANCE_RETENTION_MONTHS, PARTITION_MONTHS_AHEAD
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # archiving is optional
+    pa = ds = pq = None
+
+TABLE = "Attendance"
+DEFAULT_PARTITION = f"{TABLE}_default"
+PARTITION_COLUMN = "Date"
+_PARTITION_NAME = re.compile(rf"^{TABLE}_p(\d{{4}})_(\d{{2}})$")
+_ARCHIVE_SCHEMA = pa.schema([
+    ("AttendanceID", pa.int64()),
+    ("UserID", pa.int64()),
+    ("Date", pa.date32()),
+    ("InTime", pa.timestamp("us")),
+    ("OutTime", pa.timestamp("us")),
+    ("Latitude", pa.float64()),
+    ("Longitude", pa.float64()),
+    ("Remarks", pa.string()),
+]) if pa is not None else None
+
+
+def _month_start(day: date):
+    return day.replace(day=1)
+
+
+def _add_months(month: date, count: int):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(month: date):
+    return f"{TABLE}_p{month.year:04d}_{month.month:02d}"
+
+
+def is_partitioned(conn):
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid"
+        " WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+    ), {"table": TABLE}).first() is not None
+
+
+def list_partitions(conn):
+    """Month (first day) -> partition name for every monthly partition."""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i"
+        " JOIN pg_class c ON c.oid = i.inhrelid"
+        " JOIN pg_class p ON p.oid = i.inhparent"
+        " WHERE p.relname = :table"
+    ), {"table": TABLE}).scalars()
+    partitions = {}
+    for name in rows:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def _move_out_of_default(conn, month: date):
+    """Take the month's rows out of the DEFAULT partition; returns a temp table holding them, or None.
+
+    CREATE TABLE ... PARTITION OF fails while the default partition holds
+    rows that belong to the new range, so they are set aside first and put
+    back through the parent once the partition exists.
+    """
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": f'"{DEFAULT_PARTITION}"'}).scalar() is None:
+        return None
+    bounds = {"start": month, "end": _add_months(month, 1)}
+    in_range = f'"{PARTITION_COLUMN}" >= :start AND "{PARTITION_COLUMN}" < :end'
+    if conn.execute(text(f'SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE {in_range} LIMIT 1'), bounds).first() is None:
+        return None
+    moving = f"{_partition_name(month)}_moving"
+    conn.execute(text(f'CREATE TEMP TABLE "{moving}" (LIKE "{TABLE}") ON COMMIT DROP'))
+    # DELETE ... RETURNING moves each row exactly once, even with a concurrent run
+    conn.execute(text(
+        f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE {in_range} RETURNING *)'
+        f' INSERT INTO "{moving}" SELECT * FROM moved'
+    ), bounds)
+    return moving
+
+
+def ensure_partitions(conn, first_month: date, last_month: date):
+    """Create any missing monthly partitions between the two months (inclusive)."""
+    existing = list_partitions(conn)
+    month = _month_start(first_month)
+    while month <= last_month:
+        if month not in existing:
+            moving = _move_out_of_default(conn, month)
+            conn.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{_partition_name(month)}" PARTITION OF "{TABLE}"'
+                f" FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+            ))
+            if moving:
+                conn.execute(text(f'INSERT INTO "{TABLE}" SELECT * FROM "{moving}"'))
+                conn.execute(text(f'DROP TABLE "{moving}"'))
+        month = _add_months(month, 1)
+
+
+def migrate(engine):
+    """Convert a plain Attendance table into a monthly partitioned one, in one transaction.
+
+    The table keeps its columns, sequence and data. Rows with a NULL or
+    far-future Date land in a DEFAULT partition. No primary key is declared
+    on the parent because it would have to include Date, which is nullable;
+    AttendanceID stays indexed and sequence-generated.
+    """
+    with engine.begin() as conn:
+        if conn.dialect.name != "postgresql" or is_partitioned(conn):
+            return False
+
+        conn.execute(text(f'ALTER TABLE "{TABLE}" RENAME TO "{TABLE}_unpartitioned"'))
+        conn.execute(text(
+            f'CREATE TABLE "{TABLE}" (LIKE "{TABLE}_unpartitioned" INCLUDING DEFAULTS)'
+            f' PARTITION BY RANGE ("{PARTITION_COLUMN}")'
+        ))
+        conn.execute(text(
+            f'ALTER TABLE "{TABLE}" ADD FOREIGN KEY ("UserID") REFERENCES "Users" ("UserID")'
+        ))
+        conn.execute(text(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT'))
+
+        oldest = conn.execute(text(f'SELECT MIN("{PARTITION_COLUMN}") FROM "{TABLE}_unpartitioned"')).scalar()
+        this_month = _month_start(date.today())
+        ensure_partitions(conn, _month_start(oldest) if oldest else this_month,
+                          _add_months(this_month, PARTITION_MONTHS_AHEAD))
+
+        conn.execute(text(f'INSERT INTO "{TABLE}" SELECT * FROM "{TABLE}_unpartitioned"'))
+        # Hand the AttendanceID sequence to the new table before the old one is dropped
+        sequence = conn.execute(text(
+            f"SELECT pg_get_serial_sequence('\"{TABLE}_unpartitioned\"', 'AttendanceID')"
+        )).scalar()
+        if sequence:
+            conn.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY "{TABLE}"."AttendanceID"'))
+        conn.execute(text(f'DROP TABLE "{TABLE}_unpartitioned"'))
+
+        # Same index names as the model, now created on the partitioned parent
+        conn.execute(text(f'CREATE INDEX "ix_{TABLE}_AttendanceID" ON "{TABLE}" ("AttendanceID")'))
+        conn.execute(text(f'CREATE INDEX "ix_{TABLE}_Date" ON "{TABLE}" ("{PARTITION_COLUMN}")'))
+    return True
+
+
+# -------- Archiving --------
+def _archive_path(archive_dir: str, month: date):
+    return os.path.join(archive_dir, TABLE, f"{month.year:04d}-{month.month:02d}.parquet")
+
+
+def archive_partition(conn, month: date, name: str, archive_dir: str = ARCHIVE_DIR, batch_size: int = 50_000):
+    """Write one partition to a zstd Parquet file, then detach and drop it."""
+    path = _archive_path(archive_dir, month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    columns = ", ".join(f'"{column}"' for column in _ARCHIVE_SCHEMA.names)
+    result = conn.execute(
+        text(f'SELECT {columns} FROM "{name}" ORDER BY "AttendanceID"').execution_options(yield_per=batch_size)
+    )
+
+    # Row groups are written batch by batch, so memory stays flat per month
+    tmp_path = path + ".tmp"
+    with pq.ParquetWriter(tmp_path, _ARCHIVE_SCHEMA, compression="zstd") as writer:
+        for rows in result.partitions():
+            writer.write_table(pa.Table.from_pylist([dict(row._mapping) for row in rows], schema=_ARCHIVE_SCHEMA))
+    os.replace(tmp_path, path)
+
+    conn.execute(text(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"'))
+    conn.execute(text(f'DROP TABLE "{name}"'))
+    return path
+
+
+def ensure_upcoming_partitions(engine, months_ahead: int = PARTITION_MONTHS_AHEAD):
+    """Create partitions for this month and the next `months_ahead` (no-op off Postgres)."""
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return False
+        this_month = _month_start(date.today())
+        ensure_partitions(conn, this_month, _add_months(this_month, months_ahead))
+    return True
+
+
+def maintain(engine, retention_months: int = ATTENDANCE_RETENTION_MONTHS,
+             months_ahead: int = PARTITION_MONTHS_AHEAD, archive_dir: str = ARCHIVE_DIR):
+    """Create upcoming partitions and archive those past the retention horizon."""
+    if not ensure_upcoming_partitions(engine, months_ahead) or pq is None:
+        return []
+    cutoff = _add_months(_month_start(date.today()), -retention_months)
+    with engine.connect() as conn:
+        partitions = list_partitions(conn)
+
+    archived = []
+    for month, name in sorted(partitions.items()):
+        if month >= cutoff:
+            break
+        # One transaction per month, so a failure never drops an unarchived partition
+        with engine.begin() as conn:
+            archived.append(archive_partition(conn, month, name, archive_dir))
+    return archived
+
+
+def iter_archive(start: date, end: date, user_id: int = None, archive_dir: str = ARCHIVE_DIR,
+                 batch_size: int = 10_000):
+    """Yield archived Attendance rows with start <= Date <= end, month by month.
+
+    Rows are read one record batch at a time, so memory stays flat however
+    wide the range is.
+    """
+    if ds is None:
+        raise RuntimeError("pyarrow is required to read the attendance archive")
+    condition = (ds.field("Date") >= start) & (ds.field("Date") <= end)
+    if user_id is not None:
+        condition &= ds.field("UserID") == user_id
+
+    month = _month_start(start)
+    while month <= end:
+        path = _archive_path(archive_dir, month)
+        if os.path.exists(path):
+            for batch in ds.dataset(path, format="parquet").to_batches(filter=condition, batch_size=batch_size):
+                yield from batch.to_pylist()
+        month = _add_months(month, 1)
+
+
+def read_archive(start: date, end: date, user_id: int = None, limit: int = ARCHIVE_READ_LIMIT,
+                 offset: int = 0, archive_dir: str = ARCHIVE_DIR):
+    """At most `limit` archived rows with start <= Date <= end, skipping the first `offset`."""
+    return list(itertools.islice(iter_archive(start, end, user_id, archive_dir), offset, offset + limit))
+
+
+if __name__ == "__main__":
+    import sys
+    from app.database import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "maintain"
+    if command == "migrate":
+        print("migrated" if migrate(engine) else "nothing to migrate")
+    elif command == "maintain":
+        for path in maintain(engine):
+            print(f"archived {path}")
+    else:
+        sys.exit("usage: python -m app.partitioning [migrate|maintain]")
@@ -0,0 +1,193 @@
+"""Vectorized monthly attendance totals per employee.
+
+Attendance is pulled in columnar batches (UserID, Date, InTime, OutTime
+plus the employee's Division/Ward) and every per-shift figure is computed
+with NumPy array arithmetic. Lateness and overtime follow SHIFT_RULES,
+looked up by "Division/Ward", then "Division", then "default".
+
+Incremental mode for the current month caches the totals of days that can
+no longer change (older than PAYROLL_OPEN_DAYS) and only re-reads the open
+days on later calls.
+"""
+import threading
+from datetime import date, timedelta
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app import models
+from app.core.config import SHIFT_RULES, PAYROLL_BATCH_SIZE, PAYROLL_OPEN_DAYS
+from app.jobs import job
+
+FIELDS = ("DaysWorked", "HoursWorked", "LateArrivals", "LateMinutes", "OvertimeHours", "MissingPunches")
+
+# (year, month) -> (closed_through, totals, profiles)
+_closed_totals = {}
+_closed_lock = threading.Lock()
+
+
+def _shift_rule(division, ward):
+    return SHIFT_RULES.get(f"{division}/{ward}") or SHIFT_RULES.get(division) or SHIFT_RULES["default"]
+
+
+def _rule_arrays(divisions, wards):
+    """Per-row shift start (seconds after midnight), standard hours and grace minutes."""
+    pairs = np.array([f"{d}\x00{w}" for d, w in zip(divisions, wards)], dtype=object)
+    unique_pairs, inverse = np.unique(pairs, return_inverse=True)
+    starts, hours, grace = [], [], []
+    for pair in unique_pairs:
+        division, ward = pair.split("\x00")
+        rule = _shift_rule(division, ward)
+        hh, mm = rule["start"].split(":")
+        starts.append(int(hh) * 3600 + int(mm) * 60)
+        hours.append(float(rule["hours"]))
+        grace.append(float(rule.get("grace_minutes", 0)))
+    return np.array(starts)[inverse], np.array(hours)[inverse], np.array(grace)[inverse]
+
+
+def aggregate_batch(user_ids, days, in_times, out_times, divisions, wards):
+    """Per-employee totals for one batch: (unique user ids, matrix of FIELDS).
+
+    Several punches on one day (split shifts, re-punches) count as one day
+    worked: lateness uses the day's first InTime and overtime the day's
+    total hours. A batch must hold all of an employee-day's rows.
+    """
+    users = np.asarray(user_ids, dtype=np.int64)
+    day = np.asarray(days, dtype="datetime64[D]")
+    clock_in = np.asarray(in_times, dtype="datetime64[s]")
+    clock_out = np.asarray(out_times, dtype="datetime64[s]")
+    shift_start, shift_hours, grace = _rule_arrays(divisions, wards)
+
+    has_in = ~np.isnat(clock_in)
+    complete = has_in & ~np.isnat(clock_out) & (clock_out > clock_in)
+    hours = np.where(complete, (clock_out - clock_in).astype(np.int64) / 3600.0, 0.0)
+
+    # One entry per (UserID, Date); `first` is a row of that day, for its shift rule
+    pairs = np.stack([users, day.astype(np.int64)], axis=1)
+    employee_days, first, day_index = np.unique(pairs, axis=0, return_index=True, return_inverse=True)
+    day_index = day_index.reshape(-1)
+    no_punch = np.iinfo(np.int64).max
+    first_in = np.full(len(employee_days), no_punch)
+    np.minimum.at(first_in, day_index[has_in], clock_in[has_in].astype(np.int64))
+    worked = first_in != no_punch
+
+    day_hours = np.bincount(day_index, weights=hours, minlength=len(employee_days))
+    scheduled = employee_days[:, 1] * 86400 + shift_start[first]
+    late_minutes = np.clip((np.where(worked, first_in, scheduled) - scheduled) / 60.0, 0.0, None)
+    late = worked & (late_minutes > grace[first])
+    overtime = np.clip(day_hours - shift_hours[first], 0.0, None)
+    missing = np.bincount(day_index, weights=(has_in & ~complete).astype(np.float64), minlength=len(employee_days))
+
+    unique_users, index = np.unique(employee_days[:, 0], return_inverse=True)
+    columns = [
+        worked.astype(np.float64),
+        day_hours,
+        late.astype(np.float64),
+        np.where(late, late_minutes, 0.0),
+        overtime,
+        missing,
+    ]
+    totals = np.stack([np.bincount(index, weights=column, minlength=len(unique_users)) for column in columns], axis=1)
+    return unique_users, totals
+
+
+def _add_rows(rows, totals: dict, profiles: dict):
+    user_ids, days, in_times, out_times, divisions, wards = zip(*rows)
+    users, batch_totals = aggregate_batch(user_ids, days, in_times, out_times, divisions, wards)
+    for user_id, row in zip(users.tolist(), batch_totals):
+        totals[user_id] = totals[user_id] + row if user_id in totals else row.copy()
+    for user_id, division, ward in zip(user_ids, divisions, wards):
+        profiles.setdefault(user_id, (division, ward))
+
+
+def _accumulate(db: Session, start: date, end: date, totals: dict, profiles: dict,
+                batch_size: int = PAYROLL_BATCH_SIZE):
+    """Add attendance with start <= Date < end into `totals` (EmployeeID -> array)."""
+    stmt = (
+        select(
+            models.Attendance.UserID, models.Attendance.Date, models.Attendance.InTime,
+            models.Attendance.OutTime, models.Employee.Division, models.Employee.Ward,
+        )
+        .join(models.Employee, models.Employee.EmployeeID == models.Attendance.UserID)
+        .where(models.Attendance.Date >= start, models.Attendance.Date < end)
+        .order_by(models.Attendance.UserID, models.Attendance.Date)
+        .execution_options(yield_per=batch_size)
+    )
+    carry = []
+    for rows in db.execute(stmt).partitions():
+        rows = carry + list(rows)
+        # Hold back the last employee-day: its other punches may be in the next batch
+        split = len(rows)
+        while split and tuple(rows[split - 1][:2]) == tuple(rows[-1][:2]):
+            split -= 1
+        carry, rows = rows[split:], rows[:split]
+        if rows:
+            _add_rows(rows, totals, profiles)
+    if carry:
+        _add_rows(carry, totals, profiles)
+
+
+def _month_bounds(year: int, month: int):
+    start = date(year, month, 1)
+    end = date(year + month // 12, month % 12 + 1, 1)
+    return start, end
+
+
+def _to_rows(totals: dict, profiles: dict):
+    rows = []
+    for user_id in sorted(totals):
+        division, ward = profiles.get(user_id, (None, None))
+        row = {"EmployeeID": user_id, "Division": division, "Ward": ward}
+        row.update({field: round(float(value), 2) for field, value in zip(FIELDS, totals[user_id])})
+        row["DaysWorked"] = int(row["DaysWorked"])
+        row["LateArrivals"] = int(row["LateArrivals"])
+        row["MissingPunches"] = int(row["MissingPunches"])
+        rows.append(row)
+    return rows
+
+
+def monthly_hours(db: Session, year: int, month: int, incremental: bool = False):
+    """Per-employee hours, lateness and overtime for one month."""
+    start, end = _month_bounds(year, month)
+    closed_through = min(end, date.today() - timedelta(days=PAYROLL_OPEN_DAYS))
+    if not incremental or closed_through <= start:
+        totals, profiles = {}, {}
+        _accumulate(db, start, end, totals, profiles)
+        return _to_rows(totals, profiles)
+
+    with _closed_lock:
+        cached = _closed_totals.get((year, month))
+    if cached is None or cached[0] > closed_through:
+        cached = (start, {}, {})
+    cached_through, closed, closed_profiles = cached
+    # Days that have closed since the last call are folded into the cache
+    if cached_through < closed_through:
+        closed, closed_profiles = dict(closed), dict(closed_profiles)
+        _accumulate(db, cached_through, closed_through, closed, closed_profiles)
+        with _closed_lock:
+            _closed_totals[(year, month)] = (closed_through, closed, closed_profiles)
+
+    totals, profiles = dict(closed), dict(closed_profiles)
+    _accumulate(db, closed_through, end, totals, profiles)
+    return _to_rows(totals, profiles)
+
+
+@job("payroll.monthly_hours", queue="reports")
+def monthly_hours_job(payload: dict):
+    """Write a month's totals to payload["output"] as CSV."""
+    import csv
+    from app.database import ReadSessionLocal
+
+    with ReadSessionLocal() as db:
+        rows = monthly_hours(db, int(payload["year"]), int(payload["month"]))
+    with open(payload["output"], "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["EmployeeID", "Division", "Ward", *FIELDS])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 4:
+        sys.exit("usage: python -m app.payroll <year> <month> <output.csv>")
+    monthly_hours_job({"year": sys.argv[1], "month": sys.argv[2], "output": sys.argv[3]})
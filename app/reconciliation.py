@@ -0,0 +1,171 @@
+"""Reconcile Payments against a bank/gateway settlement statement.
+
+Open payments are loaded once into a dict keyed by TransactionRef (one
+bulk query). A ref shared by several open payments can't be matched to a
+single one, so those payments are left untouched and reported as
+duplicate_reference_in_db. The statement CSV is streamed line by line and hash-joined
+against it, statuses are written back with batched set-based UPDATEs and every
+mismatch goes to a CSV report.
+
+    python -m app.reconciliation statement.csv --report mismatches.csv
+
+The statement needs TransactionRef, Amount and Status columns (names are
+configurable). It also runs as the "payments.reconcile" background job.
+"""
+import csv
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+from app import models
+from app.jobs import job
+
+SETTLED = "Settled"
+FAILED = "Failed"
+STATEMENT_STATUSES = {
+    "success": SETTLED, "settled": SETTLED, "completed": SETTLED, "paid": SETTLED,
+    "failed": FAILED, "declined": FAILED, "reversed": FAILED, "refunded": FAILED,
+}
+REPORT_COLUMNS = ["Reason", "TransactionRef", "PaymentID", "StatementAmount", "ExpectedAmount", "StatementStatus"]
+AMOUNT_TOLERANCE = Decimal("0.01")
+
+
+def load_open_payments(db: Session):
+    """Unsettled payments as TransactionRef -> (PaymentID, billed amount or None).
+
+    Returns (payments, duplicates); refs held by more than one payment go to
+    `duplicates` as ref -> [(PaymentID, amount), ...] instead.
+    """
+    rows = db.execute(
+        select(
+            models.Payment.PaymentID,
+            models.Payment.TransactionRef,
+            func.sum(models.Billing.FinalAmount),
+        )
+        .outerjoin(models.Billing, models.Billing.PaymentID == models.Payment.PaymentID)
+        .where(
+            models.Payment.TransactionRef.isnot(None),
+            or_(models.Payment.Status.is_(None), models.Payment.Status.notin_([SETTLED, FAILED])),
+        )
+        .group_by(models.Payment.PaymentID, models.Payment.TransactionRef)
+        .execution_options(yield_per=50_000)
+    )
+    payments, duplicates = {}, {}
+    for payment_id, ref, amount in rows:
+        if ref in duplicates:
+            duplicates[ref].append((payment_id, amount))
+        elif ref in payments:
+            duplicates[ref] = [payments.pop(ref), (payment_id, amount)]
+        else:
+            payments[ref] = (payment_id, amount)
+    return payments, duplicates
+
+
+def _parse_amount(value):
+    try:
+        return Decimal(value.strip().replace(",", ""))
+    except (InvalidOperation, AttributeError):
+        return None
+
+
+def reconcile(db: Session, statement_path: str, report_path: str, batch_size: int = 10_000,
+              ref_column: str = "TransactionRef", amount_column: str = "Amount",
+              status_column: str = "Status"):
+    """Match the statement against open payments and return summary counts."""
+    open_payments, duplicates = load_open_payments(db)
+    matched_refs = set()
+    pending = {SETTLED: [], FAILED: []}  # new status -> PaymentIDs
+    summary = {
+        "lines": 0, "matched": 0, "mismatches": 0,
+        "open_payments": len(open_payments) + sum(len(found) for found in duplicates.values()),
+        "duplicate_db_references": len(duplicates),
+    }
+
+    def flush():
+        # One UPDATE ... WHERE PaymentID IN (...) per status instead of one per row
+        for status, payment_ids in pending.items():
+            if payment_ids:
+                db.execute(
+                    update(models.Payment)
+                    .where(models.Payment.PaymentID.in_(payment_ids))
+                    .values(Status=status)
+                    .execution_options(synchronize_session=False)
+                )
+                payment_ids.clear()
+        db.commit()
+
+    with open(statement_path, newline="") as statement, open(report_path, "w", newline="") as report:
+        writer = csv.writer(report)
+        writer.writerow(REPORT_COLUMNS)
+
+        def mismatch(reason, ref, payment_id=None, amount=None, expected=None, status=None):
+            summary["mismatches"] += 1
+            writer.writerow([reason, ref, payment_id, amount, expected, status])
+
+        for line in csv.DictReader(statement):
+            summary["lines"] += 1
+            ref = (line.get(ref_column) or "").strip()
+            amount = _parse_amount(line.get(amount_column))
+            raw_status = (line.get(status_column) or "").strip()
+
+            if ref in duplicates:
+                mismatch("duplicate_reference_in_db", ref, amount=amount, status=raw_status)
+                continue
+            payment = open_payments.pop(ref, None)
+            if payment is None:
+                reason = "duplicate_reference" if ref in matched_refs else "unknown_or_closed_reference"
+                mismatch(reason, ref, amount=amount, status=raw_status)
+                continue
+            matched_refs.add(ref)
+            payment_id, expected = payment
+
+            status = STATEMENT_STATUSES.get(raw_status.lower())
+            if status is None:
+                mismatch("unknown_status", ref, payment_id, amount, expected, raw_status)
+                continue
+            if status == SETTLED and expected is not None and (
+                amount is None or abs(amount - Decimal(expected)) > AMOUNT_TOLERANCE
+            ):
+                mismatch("amount_mismatch", ref, payment_id, amount, expected, raw_status)
+                continue
+
+            pending[status].append(payment_id)
+            summary["matched"] += 1
+            if summary["matched"] % batch_size == 0:
+                flush()
+        flush()
+
+        for ref, (payment_id, expected) in open_payments.items():
+            mismatch("missing_from_statement", ref, payment_id, expected=expected)
+        for ref, found in duplicates.items():
+            for payment_id, expected in found:
+                mismatch("duplicate_reference_in_db", ref, payment_id, expected=expected)
+
+    return summary
+
+
+@job("payments.reconcile", queue="reports")
+def reconcile_job(payload: dict):
+    from app.database import SessionLocal
+
+    with SessionLocal() as db:
+        reconcile(db, payload["statement"], payload["report"])
+
+
+if __name__ == "__main__":
+    import argparse
+    from time import perf_counter
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Reconcile payments against a settlement statement")
+    parser.add_argument("statement")
+    parser.add_argument("--report", default="reconciliation_mismatches.csv")
+    parser.add_argument("--ref-column", default="TransactionRef")
+    parser.add_argument("--amount-column", default="Amount")
+    parser.add_argument("--status-column", default="Status")
+    args = parser.parse_args()
+
+    started = perf_counter()
+    with SessionLocal() as db:
+        result = reconcile(db, args.statement, args.report, ref_column=args.ref_column,
+                           amount_column=args.amount_column, status_column=args.status_column)
+    print(result, f"{perf_counter() - started:.1f}s")
@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from time import perf_counter
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 from app import schemas
-from app.database import get_db
+from app.serialization import UserAdapter, UserBatchAdapter, json_response, render, to_json
+from app.cache import user_cache
+from app.audit import audit_read
+from app.database import get_db, get_read_db
 from app.crud import users as crud_users
+from app.core.security import login_throttle
+from app.core.config import BATCH_MAX_IDS
 
 router = APIRouter(
     prefix="/auth",
@@ -15,36 +22,69 @@ router = APIRouter(
 @router.post("/register", response_model=schemas.UserResponse)
 def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
-    existing_user = crud_users.get_user_by_email(db, user.Email)
-    if existing_user:
+    try:
+        new_user = crud_users.register_user(db, user)
+    except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+            detail=str(e)
         )
 
-    new_user = crud_users.create_user(db, user)
-    return new_user
+    return render(UserAdapter, new_user)
 
 
 # ----------------------------
-# Login User
+# Login throttling helpers
 # ----------------------------
-@router.post("/login")
-def login_user(credentials: schemas.UserLogin, db: Session = Depends(get_db)):
-    """Login user by verifying credentials"""
+def _client_ip(request: Request):
+    return request.client.host if request.client else "unknown"
+
+
+def _check_login_throttle(request: Request, email: str):
+    """Reject throttled attempts before any DB lookup or password hash"""
+    retry_after = login_throttle.check(_client_ip(request), email)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts. Try again later.",
+            headers={"Retry-After": str(int(retry_after) + 1)}
+        )
+
+
+def _authenticate(request: Request, credentials: schemas.UserLogin, db: Session):
+    """Look up and verify the user, feeding failures into the throttle"""
+    ip = _client_ip(request)
     user = crud_users.get_user_by_email(db, credentials.Email)
     if not user:
+        login_throttle.record_failure(ip, credentials.Email)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
-    if not crud_users.verify_password(credentials.Password, user.Password):
+    started = perf_counter()
+    verified = crud_users.verify_password(credentials.Password, user.Password)
+    login_throttle.record_verify(credentials.Email, perf_counter() - started)
+    if not verified:
+        login_throttle.record_failure(ip, credentials.Email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect password"
         )
 
+    login_throttle.record_success(ip, credentials.Email)
+    return user
+
+
+# ----------------------------
+# Login User
+# ----------------------------
+@router.post("/login")
+def login_user(credentials: schemas.UserLogin, request: Request, db: Session = Depends(get_db)):
+    """Login user by verifying credentials"""
+    _check_login_throttle(request, credentials.Email)
+    user = _authenticate(request, credentials, db)
+
     return {
         "message": "Login successful",
         "user": {
@@ -62,20 +102,10 @@ def login_user(credentials: schemas.UserLogin, db: Session = Depends(get_db)):
 # Patient Login (RoleID = 3)
 # ----------------------------
 @router.post("/login/patient")
-def login_patient(credentials: schemas.UserLogin, db: Session = Depends(get_db)):
+def login_patient(credentials: schemas.UserLogin, request: Request, db: Session = Depends(get_db)):
     """Login patient by verifying credentials and roleID=3"""
-    user = crud_users.get_user_by_email(db, credentials.Email)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
-    if not crud_users.verify_password(credentials.Password, user.Password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect password"
-        )
+    _check_login_throttle(request, credentials.Email)
+    user = _authenticate(request, credentials, db)
 
     # Verify that the user is a patient (RoleID = 3)
     if user.RoleID != 3:
@@ -96,6 +126,12 @@ def login_patient(credentials: schemas.UserLogin, db: Session = Depends(get_db))
         }
     }
 
+@router.get("/login/metrics")
+def login_metrics():
+    """Login throttle counters, including how much hashing work was shed"""
+    return login_throttle.metrics()
+
+
 @router.delete("/{user_id}")
 def delete_user(user_id: int, db: Session = Depends(get_db)):
     success = crud_users.delete_user(db, user_id)
@@ -104,9 +140,92 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     return {"message": f"User with ID {user_id} deleted successfully"}
 
 @router.get("/user/{user_id}", response_model=schemas.UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+def get_user(user_id: int, request: Request, db: Session = Depends(get_db)):
     """Get only the user table details"""
-    user = crud_users.get_user_by_id(db, user_id)
-    if not user:
+    audit_read(request, "user", user_id)
+    body = user_cache.get_or_load(
+        user_id, lambda: to_json(UserAdapter, crud_users.get_user_by_id(db, user_id))
+    )
+    if body is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
\ No newline at end of file
+    return json_response(body)
+
+
+# ----------------------------
+# Batch lookup
+# ----------------------------
+_USER_FIELDS = set(schemas.UserResponse.model_fields)
+_PROFILE_FIELDS = {
+    "Doctor": set(schemas.DoctorProfileResponse.model_fields),
+    "Patient": set(schemas.PatientProfileResponse.model_fields),
+    "Employee": set(schemas.EmployeeResponse.model_fields),
+}
+_AUDITED_PROFILES = {"Doctor": ("doctor", "doctor_profile"), "Patient": ("patient", "patient_profile")}
+
+
+def _split_values(values: list[str]):
+    return [v.strip() for value in values for v in value.split(",") if v.strip()]
+
+
+def _parse_ids(ids: list[str]):
+    try:
+        parsed = list(dict.fromkeys(int(v) for v in _split_values(ids)))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be integers")
+    if not parsed:
+        raise HTTPException(status_code=400, detail="At least one id is required")
+    if len(parsed) > BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_IDS} ids per request")
+    return parsed
+
+
+def _projection(fields: Optional[list[str]]):
+    """Build pydantic include/exclude sets for one user row from `fields`.
+
+    With no `fields`, everything but SENSITIVE_FIELDS is returned. A field
+    name selects it wherever it appears (user or profile); a section name
+    (Doctor/Patient/Employee) selects that whole profile. Sensitive fields
+    only come back when named explicitly.
+    """
+    named = set(_split_values(fields)) if fields else set()
+    unknown = named - _USER_FIELDS - set(_PROFILE_FIELDS).union(*_PROFILE_FIELDS.values())
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    hidden = set(schemas.SENSITIVE_FIELDS) - named
+    exclude = {section: hidden for section in _PROFILE_FIELDS}
+    if not named:
+        return None, exclude
+    include = {f: True for f in (named & _USER_FIELDS) | {"UserID"}}
+    for section, section_fields in _PROFILE_FIELDS.items():
+        if section in named:
+            include[section] = True
+        elif named & section_fields:
+            include[section] = named & section_fields
+    return include, exclude
+
+
+@router.get("/users", response_model=schemas.UserBatchResponse)
+def get_users(
+    request: Request,
+    ids: list[str] = Query(..., description="User IDs, repeated or comma-separated"),
+    fields: Optional[list[str]] = Query(None, description="Fields or sections (Doctor/Patient/Employee) to return"),
+    db: Session = Depends(get_read_db),
+):
+    """Users with their role profiles in one query; unknown IDs are listed under Missing"""
+    user_ids = _parse_ids(ids)
+    include, exclude = _projection(fields)
+    users, missing = crud_users.get_users_with_profiles(db, user_ids)
+
+    for user in users:
+        audit_read(request, "user", user.UserID)
+        for section, (attr, resource) in _AUDITED_PROFILES.items():
+            if getattr(user, attr) is not None and (include is None or section in include):
+                audit_read(request, resource, user.UserID)
+
+    batch = UserBatchAdapter.validate_python({"Users": users, "Missing": missing}, from_attributes=True)
+    body = UserBatchAdapter.dump_json(
+        batch,
+        include=None if include is None else {"Users": {"__all__": include}, "Missing": True},
+        exclude={"Users": {"__all__": exclude}},
+    )
+    return json_response(body)
@@ -1,23 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app import schemas
+from app.serialization import DoctorProfileAdapter, dump, json_response, to_json
+from app.cache import doctor_profile_cache
+from app.audit import audit_read
 from app.crud import doctor as crud_doctor
 
 router = APIRouter(prefix="/doctor", tags=["Doctor Dashboard"])
 
 @router.get("/{user_id}", response_model=schemas.DoctorProfileResponse)
-def get_profile(user_id: int, db: Session = Depends(get_db)):
-    profile = crud_doctor.get_doctor_profile(db, user_id)
-    if not profile:
+def get_profile(user_id: int, request: Request, db: Session = Depends(get_db)):
+    audit_read(request, "doctor_profile", user_id)
+    body = doctor_profile_cache.get_or_load(
+        user_id, lambda: to_json(DoctorProfileAdapter, crud_doctor.get_doctor_profile(db, user_id))
+    )
+    if body is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Doctor profile not found")
-    return profile
+    return json_response(body)
 
 
 @router.post("/{user_id}")
 def create_or_update_profile(user_id: int, data: schemas.DoctorProfileCreate, db: Session = Depends(get_db)):
     profile = crud_doctor.create_or_update_doctor_profile(db, user_id, data)
-    return {"message": "Doctor profile saved successfully", "profile": profile}
+    return {"message": "Doctor profile saved successfully", "profile": dump(DoctorProfileAdapter, profile)}
 
 
 @router.delete("/{user_id}")
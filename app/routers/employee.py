@@ -1,22 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from app import schemas
-from app.database import get_db
+from app.serialization import AppointmentEmployeeListAdapter, EmployeeAdapter, json_response, render, to_json
+from app.cache import employee_profile_cache
+from app.coalesce import appointments_today_flight, request_key
+from app.database import get_db, get_read_db
+from app.core.config import ARCHIVE_READ_LIMIT
 from app.crud import employee as crud_employee
+from app import partitioning, payroll
 
 router = APIRouter(prefix="/employee", tags=["Employee"])
 
 @router.get("/{user_id}", response_model=schemas.EmployeeResponse)
 def get_employee_profile(user_id: int, db: Session = Depends(get_db)):
-    profile = crud_employee.get_employee_profile(db, user_id)
-    if not profile:
+    body = employee_profile_cache.get_or_load(
+        user_id, lambda: to_json(EmployeeAdapter, crud_employee.get_employee_profile(db, user_id))
+    )
+    if body is None:
         raise HTTPException(status_code=404, detail="Employee profile not found")
-    return profile
+    return json_response(body)
 
 
 @router.post("/{user_id}", response_model=schemas.EmployeeResponse)
 def create_or_update_employee_profile(user_id: int, data: schemas.EmployeeCreate, db: Session = Depends(get_db)):
-    return crud_employee.create_or_update_employee_profile(db, user_id, data)
+    profile = crud_employee.create_or_update_employee_profile(db, user_id, data)
+    return render(EmployeeAdapter, profile)
 
 
 @router.delete("/{user_id}")
@@ -27,6 +37,39 @@ def delete_employee_profile(user_id: int, db: Session = Depends(get_db)):
     return {"message": "Employee profile deleted successfully"}
 
 
-@router.get("/appointments/today", response_model=list[schemas.AppointmentResponse])
-def todays_appointments(db: Session = Depends(get_db)):
-    return crud_employee.get_todays_appointments(db)
\ No newline at end of file
+@router.get("/appointments/today", response_model=list[schemas.AppointmentEmployeeResponse])
+def todays_appointments(request: Request, db: Session = Depends(get_read_db)):
+    # Screens polling at shift start share one query; followers never touch their own session
+    body = appointments_today_flight.do(
+        request_key(request),
+        lambda: to_json(AppointmentEmployeeListAdapter, crud_employee.get_todays_appointments(db)),
+    )
+    return json_response(body)
+
+
+@router.get("/attendance/archive", response_model=list[schemas.AttendanceResponse])
+def archived_attendance(
+    start: date,
+    end: date,
+    user_id: Optional[int] = None,
+    limit: int = Query(ARCHIVE_READ_LIMIT, ge=1, le=ARCHIVE_READ_LIMIT),
+    offset: int = Query(0, ge=0),
+):
+    """Attendance rows that have been moved out of the database into the archive, one page at a time"""
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    try:
+        return partitioning.read_archive(start, end, user_id, limit, offset)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.get("/payroll/hours", response_model=list[schemas.PayrollHoursResponse])
+def payroll_hours(
+    year: int = Query(..., ge=1, le=9998),
+    month: int = Query(..., ge=1, le=12),
+    incremental: bool = False,
+    db: Session = Depends(get_read_db),
+):
+    """Hours worked, late arrivals and overtime per employee for one month"""
+    return payroll.monthly_hours(db, year, month, incremental)
@@ -0,0 +1,38 @@
+from datetime import date
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from app.database import ReadSessionLocal
+from app import exports
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+MEDIA_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def _stream(dataset: str, start: date, end: date, format: str):
+    # The session must outlive the request handler, so the generator owns it
+    with ReadSessionLocal() as db:
+        if format == "parquet":
+            yield from exports.iter_parquet(db, dataset, start, end)
+        else:
+            yield from exports.iter_csv(db, dataset, start, end)
+
+
+@router.get("/{dataset}")
+def export_dataset(dataset: str, start: date, end: date, format: str = "csv"):
+    """Stream appointments, billing or attendance rows dated start..end (inclusive)"""
+    if dataset not in exports.DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset {dataset!r}")
+    if format not in exports.FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or parquet")
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if format == "parquet" and exports.pq is None:
+        raise HTTPException(status_code=503, detail="pyarrow is required for Parquet exports")
+
+    filename = f"{dataset}_{start.isoformat()}_{end.isoformat()}.{format}"
+    return StreamingResponse(
+        _stream(dataset, start, end, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,24 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app import schemas
+from app.serialization import AppointmentAdapter, PatientProfileAdapter, PatientSyncAdapter, PatientTimelineAdapter, json_response, render, to_json
+from app.cache import patient_profile_cache
+from app.audit import audit_read
 from app.crud import patient as crud_patient
 
 router = APIRouter(prefix="/patient", tags=["Patient Dashboard"])
 
 
+# Declared before /{user_id} so "appointment" isn't parsed as a user_id
+@router.post("/appointment", response_model=schemas.AppointmentResponse)
+def create_appointment(data: schemas.AppointmentCreate, db: Session = Depends(get_db)):
+    try:
+        appointment = crud_patient.create_appointment(db, data)
+        return render(AppointmentAdapter, appointment)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 @router.get("/{user_id}", response_model=schemas.PatientProfileResponse)
-def get_patient_profile(user_id: int, db: Session = Depends(get_db)):
-    profile = crud_patient.get_patient_profile(db, user_id)
-    if not profile:
+def get_patient_profile(user_id: int, request: Request, db: Session = Depends(get_db)):
+    audit_read(request, "patient_profile", user_id)
+    body = patient_profile_cache.get_or_load(
+        user_id, lambda: to_json(PatientProfileAdapter, crud_patient.get_patient_profile(db, user_id))
+    )
+    if body is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Patient profile not found")
-    return profile
+    return json_response(body)
+
+
+@router.get("/{user_id}/timeline", response_model=schemas.PatientTimelineResponse)
+def get_patient_timeline(
+    user_id: int,
+    request: Request,
+    before: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+):
+    """Appointments with consultations, investigations, reports and bills, newest first"""
+    audit_read(request, "patient_timeline", user_id)
+    timeline = crud_patient.get_patient_timeline(db, user_id, before, before_id, limit)
+    return render(PatientTimelineAdapter, timeline)
+
+
+@router.get("/{user_id}/sync", response_model=schemas.PatientSyncResponse)
+def sync_patient(user_id: int, request: Request, since: Optional[datetime] = None,
+                 db: Session = Depends(get_read_db)):
+    """Rows changed since the `since` watermark plus tombstones for deleted rows"""
+    audit_read(request, "patient_sync", user_id)
+    return render(PatientSyncAdapter, crud_patient.get_patient_changes(db, user_id, since))
 
 
 @router.post("/{user_id}", response_model=schemas.PatientProfileResponse)
 def create_or_update_patient_profile(user_id: int, data: schemas.PatientProfileCreate, db: Session = Depends(get_db)):
     profile = crud_patient.create_or_update_patient_profile(db, user_id, data)
-    return profile
+    return render(PatientProfileAdapter, profile)
 
 
 @router.delete("/{user_id}")
@@ -27,11 +68,3 @@ def delete_patient_profile(user_id: int, db: Session = Depends(get_db)):
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Patient profile not found")
     return {"message": "Patient profile deleted successfully"}
-
-@router.post("/appointment", response_model=schemas.AppointmentResponse)
-def create_appointment(data: schemas.AppointmentCreate, db: Session = Depends(get_db)):
-    try:
-        appointment = crud_patient.create_appointment(db, data)
-        return appointment
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
\ No newline at end of file
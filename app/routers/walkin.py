@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app import schemas, walkin
+from app.database import get_db
+from app.crud import doctor as crud_doctor, patient as crud_patient
+
+router = APIRouter(prefix="/queue", tags=["Walk-in Queue"])
+
+
+def valid_queue_key(queue_key: str) -> str:
+    try:
+        walkin.parse_queue_key(queue_key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return queue_key
+
+
+def _token_or_404(token):
+    if token is None:
+        raise HTTPException(status_code=404, detail="Token not found")
+    return token
+
+
+@router.post("/{queue_key}/tokens", response_model=schemas.WalkInTokenResponse)
+def issue_token(data: schemas.WalkInTokenCreate, queue_key: str = Depends(valid_queue_key),
+                db: Session = Depends(get_db)):
+    kind, ident = walkin.parse_queue_key(queue_key)
+    if kind == "doctor" and not crud_doctor.get_doctor_profile(db, int(ident)):
+        raise HTTPException(status_code=404, detail="Doctor profile not found")
+    profile = crud_patient.get_patient_profile(db, data.PatientID)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Patient profile not found")
+    return walkin.issue_token(db, queue_key, data.PatientID, profile.RiskCategory)
+
+
+@router.get("/{queue_key}", response_model=schemas.WalkInBoardResponse)
+def queue_board(queue_key: str = Depends(valid_queue_key), db: Session = Depends(get_db)):
+    return walkin.board(db, queue_key)
+
+
+@router.post("/{queue_key}/next", response_model=schemas.WalkInTokenResponse)
+def call_next_token(queue_key: str = Depends(valid_queue_key), db: Session = Depends(get_db)):
+    token = walkin.call_next(db, queue_key)
+    if token is None:
+        raise HTTPException(status_code=404, detail="No patients waiting")
+    return token
+
+
+@router.get("/{queue_key}/tokens/{token_number}", response_model=schemas.WalkInTokenResponse)
+def token_status(token_number: int, queue_key: str = Depends(valid_queue_key), db: Session = Depends(get_db)):
+    return _token_or_404(walkin.token_status(db, queue_key, token_number))
+
+
+@router.patch("/{queue_key}/tokens/{token_number}", response_model=schemas.WalkInTokenResponse)
+def reprioritize_token(token_number: int, data: schemas.WalkInReprioritize,
+                       queue_key: str = Depends(valid_queue_key), db: Session = Depends(get_db)):
+    try:
+        return _token_or_404(walkin.reprioritize(db, queue_key, token_number, data.RiskCategory))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/{queue_key}/tokens/{token_number}/complete", response_model=schemas.WalkInTokenResponse)
+def complete_token(token_number: int, queue_key: str = Depends(valid_queue_key), db: Session = Depends(get_db)):
+    try:
+        return _token_or_404(walkin.complete(db, queue_key, token_number))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.delete("/{queue_key}/tokens/{token_number}", response_model=schemas.WalkInTokenResponse)
+def cancel_token(token_number: int, queue_key: str = Depends(valid_queue_key), db: Session = Depends(get_db)):
+    try:
+        return _token_or_404(walkin.cancel(db, queue_key, token_number))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List, Any
 from datetime import date, datetime
 
@@ -69,7 +69,7 @@ class PatientProfileCreate(PatientProfileBase):
 class PatientProfileResponse(PatientProfileBase):
     PatientID: int
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 
 class DoctorProfileBase(BaseModel):
@@ -307,3 +307,154 @@ class AttendanceResponse(AttendanceBase):
     AttendanceID: int
     class Config:
         from_attributes = True
+
+class PayrollHoursResponse(BaseModel):
+    EmployeeID: int
+    Division: Optional[str]
+    Ward: Optional[str]
+    DaysWorked: int
+    HoursWorked: float
+    LateArrivals: int
+    LateMinutes: float
+    OvertimeHours: float
+    MissingPunches: int
+
+
+# =========================
+# 7️⃣  Patient Timeline
+# =========================
+
+# Mirror the stored columns: foreign keys and text columns are nullable in
+# the tables, so a historical row may have them unset (e.g. an unpaid bill).
+
+class AppointmentRecordResponse(BaseModel):
+    AppointmentID: int
+    PatientID: Optional[int] = None
+    DoctorID: Optional[int] = None
+    DateTime: Optional[datetime] = None
+    Type: Optional[str] = None
+    Status: Optional[str] = None
+    class Config:
+        from_attributes = True
+
+class ConsultationRecordResponse(BaseModel):
+    ConsultationID: int
+    AppointmentID: Optional[int] = None
+    Notes: Optional[str] = None
+    PrescriptionFile: Optional[str] = None
+    FollowUpRequired: Optional[bool] = None
+    class Config:
+        from_attributes = True
+
+class InvestigationBookingRecordResponse(BaseModel):
+    BookingID: int
+    AppointmentID: Optional[int] = None
+    InvestigationID: Optional[int] = None
+    LabID: Optional[int] = None
+    Status: Optional[str] = None
+    ResultDate: Optional[date] = None
+    class Config:
+        from_attributes = True
+
+class ReportRecordResponse(BaseModel):
+    ReportID: int
+    BookingID: Optional[int] = None
+    FilePath: Optional[str] = None
+    AbnormalFlag: Optional[bool] = None
+    class Config:
+        from_attributes = True
+
+class BillingRecordResponse(BaseModel):
+    BillID: int
+    AppointmentID: Optional[int] = None
+    PaymentID: Optional[int] = None
+    DiscountID: Optional[int] = None
+    Amount: Optional[float] = None
+    FinalAmount: Optional[float] = None
+    Date: Optional[datetime] = None
+    class Config:
+        from_attributes = True
+
+class TimelineBookingResponse(InvestigationBookingRecordResponse):
+    Reports: List[ReportRecordResponse] = Field(default=[], validation_alias="reports")
+
+class TimelineAppointmentResponse(AppointmentRecordResponse):
+    Consultations: List[ConsultationRecordResponse] = Field(default=[], validation_alias="consultations")
+    Bookings: List[TimelineBookingResponse] = Field(default=[], validation_alias="bookings")
+    Bills: List[BillingRecordResponse] = Field(default=[], validation_alias="bills")
+
+class PatientTimelineResponse(BaseModel):
+    PatientID: int
+    Appointments: List[TimelineAppointmentResponse]
+    NextBefore: Optional[datetime] = None
+    NextBeforeID: Optional[int] = None
+
+
+# =========================
+# 8️⃣  Mobile Delta Sync
+# =========================
+
+class SyncTombstoneResponse(BaseModel):
+    Entity: str
+    EntityID: int
+    DeletedAt: datetime
+    class Config:
+        from_attributes = True
+
+class PatientSyncResponse(BaseModel):
+    Watermark: datetime
+    Profile: Optional[PatientProfileResponse] = None
+    Appointments: List[AppointmentRecordResponse] = []
+    Consultations: List[ConsultationRecordResponse] = []
+    Bookings: List[InvestigationBookingRecordResponse] = []
+    Reports: List[ReportRecordResponse] = []
+    Tombstones: List[SyncTombstoneResponse] = []
+
+
+# =========================
+# 9️⃣  Walk-in Queue
+# =========================
+
+class WalkInTokenCreate(BaseModel):
+    PatientID: int
+
+class WalkInReprioritize(BaseModel):
+    RiskCategory: Optional[str] = None
+
+class WalkInTokenResponse(BaseModel):
+    QueueKey: str
+    ServiceDate: date
+    TokenNumber: int
+    PatientID: int
+    RiskCategory: Optional[str] = None
+    Status: str
+    ArrivedAt: datetime
+    CalledAt: Optional[datetime] = None
+    CompletedAt: Optional[datetime] = None
+    Position: Optional[int] = None
+    EstimatedWaitMinutes: Optional[float] = None
+    class Config:
+        from_attributes = True
+
+class WalkInBoardResponse(BaseModel):
+    QueueKey: str
+    Serving: List[WalkInTokenResponse] = []
+    Waiting: List[WalkInTokenResponse] = []
+    AverageConsultMinutes: float
+
+
+# =========================
+# 🔟  Batch Lookups
+# =========================
+
+# Left out of list views unless a caller names them in `fields`
+SENSITIVE_FIELDS = ("AadharNumber", "PANNumber", "AccountNumber", "IFSCCode")
+
+class UserWithProfilesResponse(UserResponse):
+    Doctor: Optional[DoctorProfileResponse] = Field(default=None, validation_alias="doctor")
+    Patient: Optional[PatientProfileResponse] = Field(default=None, validation_alias="patient")
+    Employee: Optional[EmployeeResponse] = Field(default=None, validation_alias="employee")
+
+class UserBatchResponse(BaseModel):
+    Users: List[UserWithProfilesResponse] = []
+    Missing: List[int] = []
@@ -0,0 +1,111 @@
+from time import perf_counter
+from fastapi import Response
+from pydantic import TypeAdapter
+from app import schemas
+
+# -------- Precompiled adapters --------
+# Building a TypeAdapter compiles the pydantic-core validator/serializer once,
+# so list endpoints don't rebuild a `list[...]` schema on every request.
+UserAdapter = TypeAdapter(schemas.UserResponse)
+PatientProfileAdapter = TypeAdapter(schemas.PatientProfileResponse)
+DoctorProfileAdapter = TypeAdapter(schemas.DoctorProfileResponse)
+EmployeeAdapter = TypeAdapter(schemas.EmployeeResponse)
+AppointmentAdapter = TypeAdapter(schemas.AppointmentResponse)
+PatientTimelineAdapter = TypeAdapter(schemas.PatientTimelineResponse)
+PatientSyncAdapter = TypeAdapter(schemas.PatientSyncResponse)
+UserBatchAdapter = TypeAdapter(schemas.UserBatchResponse)
+
+UserListAdapter = TypeAdapter(list[schemas.UserResponse])
+AppointmentListAdapter = TypeAdapter(list[schemas.AppointmentResponse])
+AppointmentEmployeeListAdapter = TypeAdapter(list[schemas.AppointmentEmployeeResponse])
+
+
+def dump(adapter: TypeAdapter, obj):
+    """Validate ORM rows (or dicts) once and return JSON-ready python data."""
+    return adapter.dump_python(adapter.validate_python(obj, from_attributes=True), mode="json")
+
+
+def to_json(adapter: TypeAdapter, obj):
+    """Validate ORM rows once and encode them to JSON bytes (None stays None)."""
+    if obj is None:
+        return None
+    return adapter.dump_json(adapter.validate_python(obj, from_attributes=True))
+
+
+def json_response(body: bytes, status_code: int = 200):
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+def render(adapter: TypeAdapter, obj, status_code: int = 200):
+    """Validate ORM rows once and return an already-encoded JSON response.
+
+    Returning a Response makes FastAPI skip its own `response_model`
+    validation, so trusted rows go through pydantic exactly once and are
+    encoded straight to bytes by pydantic-core.
+    """
+    return json_response(to_json(adapter, obj), status_code)
+
+
+# -------- Microbenchmark --------
+# python -m app.serialization [rounds]
+_SAMPLES = {
+    "UserResponse": (schemas.UserResponse, {
+        "UserID": 1, "RoleID": 3, "FirstName": "Asha", "LastName": "Rao",
+        "Email": "asha@example.com", "Phone": "9000000001",
+        "CreatedAt": "2025-01-01T09:00:00", "UpdatedAt": "2025-01-01T09:00:00",
+        "Gender": "F", "DOB": "1990-04-01", "Address": "12 MG Road",
+    }),
+    "PatientProfileResponse": (schemas.PatientProfileResponse, {
+        "PatientID": 1, "Height": 160.0, "Weight": 55.5, "BloodGroup": "O+",
+        "Allergies": None, "ChronicDiseases": "Asthma", "RiskCategory": "Medium",
+        "FamilyHistory": None, "Lifestyle": "Active",
+    }),
+    "DoctorProfileResponse": (schemas.DoctorProfileResponse, {
+        "DoctorID": 2, "Qualification": "MBBS", "Specialization": "General",
+        "RegistrationNumber": "KMC-1", "ExperienceYears": 8, "ClinicAddress": "Ward 3",
+        "AvailabilitySchedule": {"mon": ["09:00", "13:00"]}, "AadharNumber": "123412341234",
+        "PANNumber": "ABCDE1234F", "AccountNumber": "000111", "IFSCCode": "SBIN0001",
+    }),
+    "EmployeeResponse": (schemas.EmployeeResponse, {
+        "EmployeeID": 4, "Division": "Nursing", "Ward": "A", "Designation": "Nurse",
+        "JoinDate": "2020-06-01", "Status": "Active", "AadharNumber": "432143214321",
+        "PANNumber": "ABCDE4321F", "AccountNumber": "000222", "IFSCCode": "SBIN0002",
+    }),
+    "AppointmentResponse": (schemas.AppointmentResponse, {
+        "AppointmentID": 10, "PatientID": 1, "DoctorID": 2,
+        "DateTime": "2025-01-02T10:30:00", "Type": "OPD", "Status": "Booked",
+    }),
+    "AppointmentEmployeeResponse": (schemas.AppointmentEmployeeResponse, {
+        "AppointmentID": 10, "PatientID": 1, "PatientName": "Asha Rao", "DoctorID": 2,
+        "DoctorName": "Vikram Shah", "DateTime": "2025-01-02T10:30:00", "Type": "OPD",
+        "Status": "Booked",
+    }),
+}
+
+
+def benchmark(rounds: int = 20000):
+    """Compare per-object cost of FastAPI's default path against `render`."""
+    import json
+    from types import SimpleNamespace
+    from fastapi.encoders import jsonable_encoder
+
+    print(f"{'schema':<30}{'default us/obj':>16}{'adapter us/obj':>16}")
+    for name, (schema, sample) in _SAMPLES.items():
+        row = SimpleNamespace(**schema.model_validate(sample).model_dump())
+        rows = [row] * rounds
+        adapter = TypeAdapter(list[schema])
+
+        start = perf_counter()
+        json.dumps(jsonable_encoder([schema.model_validate(r, from_attributes=True) for r in rows]))
+        default = (perf_counter() - start) / rounds * 1e6
+
+        start = perf_counter()
+        adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+        fast = (perf_counter() - start) / rounds * 1e6
+
+        print(f"{name:<30}{default:>16.2f}{fast:>16.2f}")
+
+
+if __name__ == "__main__":
+    import sys
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
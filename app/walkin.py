@@ -0,0 +1,249 @@
+"""Per-doctor and per-ward walk-in queues with live token numbers.
+
+Each queue ("doctor-<DoctorID>" or "ward-<Ward>") hands out sequential
+token numbers per day and serves patients in order of arrival time, moved
+forward by WALKIN_RISK_BOOST_MINUTES for the patient's RiskCategory.
+
+WalkInTokens is the queue itself, so every API worker sees the same line:
+- token numbers come from a per-queue/day counter row, incremented with
+  one upsert ... RETURNING, so two workers can never hand out the same one;
+- each token stores its Priority, and the composite index on
+  (QueueKey, ServiceDate, Status, Priority, TokenNumber) plays the role of
+  a heap: the next patient is the first waiting entry, and issuing,
+  calling and reprioritizing are single O(log n) index operations;
+- state changes are conditional UPDATEs on the expected Status, so two
+  workers calling "next" at once never call the same token.
+
+Estimated waits use a rolling average of the queue's last
+WALKIN_DURATION_WINDOW consultation durations (called -> completed).
+
+Timestamps are stored in UTC like the rest of the schema. Only ServiceDate,
+the clinic day a token belongs to, follows local time.
+"""
+from datetime import datetime
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app import models
+from app.core.config import (
+    WALKIN_RISK_BOOST_MINUTES, WALKIN_DEFAULT_CONSULT_MINUTES, WALKIN_DURATION_WINDOW,
+)
+
+QUEUE_KINDS = ("doctor", "ward")
+OPEN_STATUSES = ("waiting", "called")
+_FIELDS = ("QueueKey", "ServiceDate", "TokenNumber", "PatientID", "RiskCategory", "Status",
+           "ArrivedAt", "CalledAt", "CompletedAt")
+
+
+def parse_queue_key(key: str):
+    """Split "doctor-12" / "ward-A" into (kind, ident), rejecting anything else."""
+    kind, _, ident = key.partition("-")
+    if kind not in QUEUE_KINDS or not ident:
+        raise ValueError("Queue must be 'doctor-<DoctorID>' or 'ward-<Ward>'")
+    if kind == "doctor" and not ident.isdigit():
+        raise ValueError("Doctor queue must be 'doctor-<DoctorID>'")
+    return kind, ident
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def service_date():
+    """Today's clinic day, in local time."""
+    return datetime.now().date()
+
+
+def priority(arrived_at: datetime, risk_category) -> float:
+    """Lower is served first: arrival time (naive UTC) less the risk boost."""
+    return (arrived_at - _EPOCH).total_seconds() - WALKIN_RISK_BOOST_MINUTES.get(risk_category or "", 0) * 60
+
+
+def _next_number(db: Session, key: str, day):
+    table = models.WalkInCounter.__table__
+    insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    statement = (
+        insert(table)
+        .values(QueueKey=key, ServiceDate=day, LastNumber=1)
+        .on_conflict_do_update(index_elements=["QueueKey", "ServiceDate"],
+                               set_={"LastNumber": table.c.LastNumber + 1})
+        .returning(table.c.LastNumber)
+    )
+    return db.execute(statement).scalar_one()
+
+
+def _get_token(db: Session, key: str, number: int, day):
+    Token = models.WalkInToken
+    return db.query(Token).filter(
+        Token.QueueKey == key, Token.ServiceDate == day, Token.TokenNumber == number
+    ).first()
+
+
+def _transition(db: Session, token, expected: tuple, **values):
+    """Apply `values` only if the token is still in one of the `expected` statuses."""
+    Token = models.WalkInToken
+    result = db.execute(
+        update(Token)
+        .where(Token.TokenID == token.TokenID, Token.Status.in_(expected))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    db.refresh(token)
+    return result.rowcount == 1
+
+
+# -------- Estimates --------
+def average_minutes(db: Session, key: str, day) -> float:
+    Token = models.WalkInToken
+    rows = (
+        db.query(Token.CalledAt, Token.CompletedAt)
+        .filter(Token.QueueKey == key, Token.ServiceDate == day, Token.Status == "completed",
+                Token.CalledAt.isnot(None))
+        .order_by(Token.CompletedAt.desc())
+        .limit(WALKIN_DURATION_WINDOW)
+        .all()
+    )
+    if not rows:
+        return WALKIN_DEFAULT_CONSULT_MINUTES
+    return sum((done - called).total_seconds() / 60 for called, done in rows) / len(rows)
+
+
+def _consult_remaining(db: Session, key: str, day, average: float, now: datetime) -> float:
+    """Minutes likely left on the longest-running consultation in progress."""
+    Token = models.WalkInToken
+    started = db.query(func.min(Token.CalledAt)).filter(
+        Token.QueueKey == key, Token.ServiceDate == day, Token.Status == "called"
+    ).scalar()
+    if started is None:
+        return 0.0
+    return max(average - (now - started).total_seconds() / 60, 0.0)
+
+
+def _estimated_wait(position: int, average: float, remaining: float) -> float:
+    return round((position - 1) * average + remaining, 1)
+
+
+def _position(db: Session, token) -> int:
+    """1-based place in line: waiting tokens that sort ahead of this one, plus one."""
+    Token = models.WalkInToken
+    ahead = db.query(func.count(Token.TokenID)).filter(
+        Token.QueueKey == token.QueueKey, Token.ServiceDate == token.ServiceDate,
+        Token.Status == "waiting",
+        or_(Token.Priority < token.Priority,
+            and_(Token.Priority == token.Priority, Token.TokenNumber < token.TokenNumber)),
+    ).scalar()
+    return ahead + 1
+
+
+def _snapshot(db: Session, token, now: datetime):
+    data = {field: getattr(token, field) for field in _FIELDS}
+    if token.Status == "waiting":
+        average = average_minutes(db, token.QueueKey, token.ServiceDate)
+        remaining = _consult_remaining(db, token.QueueKey, token.ServiceDate, average, now)
+        data["Position"] = _position(db, token)
+        data["EstimatedWaitMinutes"] = _estimated_wait(data["Position"], average, remaining)
+    return data
+
+
+# -------- Operations; each returns a plain dict, or None if the token doesn't exist --------
+def issue_token(db: Session, key: str, patient_id: int, risk_category=None):
+    parse_queue_key(key)
+    now, day = datetime.utcnow(), service_date()
+    token = models.WalkInToken(
+        QueueKey=key, ServiceDate=day, TokenNumber=_next_number(db, key, day),
+        PatientID=patient_id, RiskCategory=risk_category, Priority=priority(now, risk_category),
+        Status="waiting", ArrivedAt=now,
+    )
+    db.add(token)
+    db.commit()
+    db.refresh(token)
+    return _snapshot(db, token, now)
+
+
+def call_next(db: Session, key: str):
+    """Mark the first waiting token as called; retries if another worker got there first."""
+    Token = models.WalkInToken
+    now, day = datetime.utcnow(), service_date()
+    while True:
+        token = (
+            db.query(Token)
+            .filter(Token.QueueKey == key, Token.ServiceDate == day, Token.Status == "waiting")
+            .order_by(Token.Priority, Token.TokenNumber)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if token is None:
+            db.rollback()
+            return None
+        if _transition(db, token, ("waiting",), Status="called", CalledAt=now):
+            return _snapshot(db, token, now)
+
+
+def _change(db: Session, key: str, number: int, expected: tuple, error: str, values):
+    """Move a token on from one of the `expected` statuses; `values(token)` gives the new columns."""
+    now = datetime.utcnow()
+    token = _get_token(db, key, number, service_date())
+    if token is None:
+        return None
+    if token.Status not in expected or not _transition(db, token, expected, **values(token)):
+        raise ValueError(error.format(status=token.Status))
+    return _snapshot(db, token, now)
+
+
+def reprioritize(db: Session, key: str, number: int, risk_category):
+    return _change(db, key, number, ("waiting",), "Only waiting tokens can be reprioritized",
+                   lambda t: {"RiskCategory": risk_category, "Priority": priority(t.ArrivedAt, risk_category)})
+
+
+def cancel(db: Session, key: str, number: int):
+    return _change(db, key, number, OPEN_STATUSES, "Token is already {status}",
+                   lambda t: {"Status": "cancelled"})
+
+
+def complete(db: Session, key: str, number: int):
+    return _change(db, key, number, ("called",), "Only called tokens can be completed",
+                   lambda t: {"Status": "completed", "CompletedAt": datetime.utcnow()})
+
+
+def token_status(db: Session, key: str, number: int):
+    now = datetime.utcnow()
+    token = _get_token(db, key, number, service_date())
+    return None if token is None else _snapshot(db, token, now)
+
+
+def board(db: Session, key: str):
+    Token = models.WalkInToken
+    now, day = datetime.utcnow(), service_date()
+    tokens = (
+        db.query(Token)
+        .filter(Token.QueueKey == key, Token.ServiceDate == day, Token.Status.in_(OPEN_STATUSES))
+        .order_by(Token.Priority, Token.TokenNumber)
+        .all()
+    )
+    average = average_minutes(db, key, day)
+    remaining = _consult_remaining(db, key, day, average, now)
+    serving = sorted((t for t in tokens if t.Status == "called"), key=lambda t: t.CalledAt)
+    waiting = []
+    for position, token in enumerate((t for t in tokens if t.Status == "waiting"), start=1):
+        data = {field: getattr(token, field) for field in _FIELDS}
+        data["Position"] = position
+        data["EstimatedWaitMinutes"] = _estimated_wait(position, average, remaining)
+        waiting.append(data)
+    return {
+        "QueueKey": key,
+        "Serving": [{field: getattr(t, field) for field in _FIELDS} for t in serving],
+        "Waiting": waiting,
+        "AverageConsultMinutes": round(average, 1),
+    }
+
+
+def cancel_stale_tokens(engine):
+    """Cancel tokens left open from earlier days; run at startup."""
+    Token = models.WalkInToken
+    with engine.begin() as conn:
+        return conn.execute(
+            update(Token)
+            .where(Token.ServiceDate < service_date(), Token.Status.in_(OPEN_STATUSES))
+            .values(Status="cancelled")
+        ).rowcount
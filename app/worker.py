@@ -0,0 +1,228 @@
+"""Background job worker.
+
+    python -m app.worker [--pool thread|process] [--queues default:4,reports:2]
+
+Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+workers can share the Jobs table without double-running a job. While a job
+runs, its worker refreshes LockedAt every JOB_HEARTBEAT_SECONDS; a running
+job whose lock is older than JOB_LOCK_TIMEOUT_SECONDS belonged to a worker
+that died, and is retried (or failed, once out of attempts). A worker only
+records a result while LockedAt still holds the value it last wrote, so a
+job taken over by another worker is never overwritten by the old one.
+"""
+import argparse
+import logging
+import random
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, update
+from app import jobs, models
+from app.database import SessionLocal
+from app.core.config import (
+    JOB_QUEUES, JOB_POOL, JOB_POLL_SECONDS, JOB_LOCK_TIMEOUT_SECONDS, JOB_HEARTBEAT_SECONDS,
+    JOB_BACKOFF_BASE_SECONDS, JOB_BACKOFF_MAX_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _execute(name: str, payload: dict):
+    """Run one job; module-level so process pools can pickle it."""
+    jobs.get_handler(name)(payload)
+
+
+def backoff(attempts: int):
+    """Exponential backoff with jitter, capped at JOB_BACKOFF_MAX_SECONDS."""
+    delay = min(JOB_BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), JOB_BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+class Worker:
+    def __init__(self, queues=None, pool=JOB_POOL, poll_seconds=JOB_POLL_SECONDS,
+                 heartbeat_seconds=JOB_HEARTBEAT_SECONDS):
+        self.queues = dict(queues or JOB_QUEUES)
+        self.poll_seconds = poll_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        workers = sum(self.queues.values())
+        if pool == "process":
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=jobs.import_job_modules)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.in_flight = {queue: 0 for queue in self.queues}
+        self.owned = {}  # JobID -> LockedAt this worker last wrote
+        self._lock = threading.Lock()
+        self._owned_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat = None
+
+    def claim(self, queue: str, limit: int):
+        """Lock up to `limit` due jobs of `queue` and mark them running."""
+        Job = models.Job
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=JOB_LOCK_TIMEOUT_SECONDS)
+        with SessionLocal() as db:
+            # Jobs that died with their worker on the last attempt won't be retried
+            db.execute(
+                update(Job)
+                .where(Job.Queue == queue, Job.Status == "running", Job.LockedAt < stale,
+                       Job.Attempts >= Job.MaxAttempts)
+                .values(Status="failed", LockedAt=None,
+                        LastError="Worker stopped responding while running the job")
+                .execution_options(synchronize_session=False)
+            )
+            claimed = (
+                db.query(Job)
+                .filter(
+                    Job.Queue == queue,
+                    or_(
+                        and_(Job.Status == "queued", Job.RunAt <= now),
+                        # Jobs of a worker that died mid-run
+                        and_(Job.Status == "running", Job.LockedAt < stale, Job.Attempts < Job.MaxAttempts),
+                    ),
+                )
+                .order_by(Job.RunAt)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            for claimed_job in claimed:
+                claimed_job.Status = "running"
+                claimed_job.LockedAt = now
+                claimed_job.Attempts += 1
+            db.commit()
+            with self._owned_lock:
+                self.owned.update((j.JobID, now) for j in claimed)
+            return [(j.JobID, j.Name, j.Payload or {}) for j in claimed]
+
+    def heartbeat(self):
+        """Refresh LockedAt on every job this worker is running; drops jobs it no longer owns."""
+        now = datetime.utcnow()
+        with self._owned_lock, SessionLocal() as db:
+            lost = []
+            for job_id, locked_at in self.owned.items():
+                refreshed = db.execute(
+                    update(models.Job)
+                    .where(models.Job.JobID == job_id, models.Job.LockedAt == locked_at)
+                    .values(LockedAt=now)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                if not refreshed:
+                    lost.append(job_id)
+            db.commit()
+            for job_id in self.owned:
+                self.owned[job_id] = now
+            for job_id in lost:
+                logger.warning("Job %s was taken over by another worker", job_id)
+                del self.owned[job_id]
+
+    def finish(self, job_id: int, error: str = None):
+        """Record the outcome, unless another worker has taken the job over meanwhile."""
+        with self._owned_lock, SessionLocal() as db:
+            locked_at = self.owned.pop(job_id, None)
+            finished = None
+            if locked_at is not None:
+                finished = (
+                    db.query(models.Job)
+                    .filter(models.Job.JobID == job_id, models.Job.LockedAt == locked_at)
+                    .with_for_update()
+                    .first()
+                )
+            if finished is None:
+                logger.warning("Discarding result of job %s: it is no longer locked by this worker", job_id)
+                return False
+            finished.LockedAt = None
+            if error is None:
+                finished.Status = "done"
+                finished.LastError = None
+            elif finished.Attempts >= finished.MaxAttempts:
+                finished.Status = "failed"
+                finished.LastError = error
+            else:
+                finished.Status = "queued"
+                finished.LastError = error
+                finished.RunAt = datetime.utcnow() + backoff(finished.Attempts)
+            db.commit()
+            return True
+
+    def _done(self, queue: str, job_id: int, future):
+        error = None
+        exc = future.exception()
+        if exc is not None:
+            error = "".join(traceback.format_exception(exc))
+            logger.warning("Job %s failed: %s", job_id, exc)
+        try:
+            self.finish(job_id, error)
+        finally:
+            with self._lock:
+                self.in_flight[queue] -= 1
+            self._wake.set()
+
+    def run_once(self):
+        """Claim and submit whatever each queue has room for; returns jobs started."""
+        started = 0
+        for queue, limit in self.queues.items():
+            with self._lock:
+                free = limit - self.in_flight[queue]
+            if free <= 0:
+                continue
+            for job_id, name, payload in self.claim(queue, free):
+                with self._lock:
+                    self.in_flight[queue] += 1
+                future = self.executor.submit(_execute, name, payload)
+                future.add_done_callback(lambda f, q=queue, j=job_id: self._done(q, j, f))
+                started += 1
+        return started
+
+    def _beat(self):
+        while not self._heartbeat_stop.wait(self.heartbeat_seconds):
+            try:
+                self.heartbeat()
+            except Exception:
+                logger.exception("Job heartbeat failed")
+
+    def run(self):
+        logger.info("Worker started for queues %s", self.queues)
+        self._heartbeat = threading.Thread(target=self._beat, name="job-heartbeat", daemon=True)
+        self._heartbeat.start()
+        while not self._stopping.is_set():
+            try:
+                started = self.run_once()
+            except Exception:
+                logger.exception("Claiming jobs failed")
+                started = 0
+            if not started:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def stop(self, wait: bool = True):
+        self._stopping.set()
+        self._wake.set()
+        self.executor.shutdown(wait=wait)  # jobs keep heartbeating until they finish
+        self._heartbeat_stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background jobs")
+    parser.add_argument("--pool", choices=["thread", "process"], default=JOB_POOL)
+    parser.add_argument("--queues", help="comma-separated queue:concurrency pairs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    jobs.import_job_modules()
+    queues = None
+    if args.queues:
+        queues = {name: int(limit) for name, limit in (item.split(":") for item in args.queues.split(","))}
+
+    worker = Worker(queues=queues, pool=args.pool)
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import os
+import tempfile
+
+# app.database builds its engines at import time; point them at a throwaway
+# database before anything under app/ is imported.
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/app.db"
+os.environ["REPLICA_URLS"] = ""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app import models  # noqa: F401  (registers the tables)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/test.db")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def statements(engine):
+    """SQL statements executed on `engine` while the test runs."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
@@ -0,0 +1,33 @@
+from sqlalchemy import create_engine
+from app import models
+from app.audit import AuditLog
+
+
+def test_full_buffer_drops_oldest_without_touching_the_database(engine, statements):
+    log = AuditLog(engine, capacity=3, flush_batch=100)
+    for subject_id in range(5):
+        log.record("patient_profile", subject_id)
+
+    assert statements == []
+    assert [row[3] for row in log._buffer] == [2, 3, 4]
+    assert log.metrics()["dropped"] == 2
+
+    assert log.flush() == 3
+    with engine.connect() as conn:
+        assert [row.SubjectID for row in conn.execute(models.AccessAudit.__table__.select())] == [2, 3, 4]
+
+
+def test_failed_flushes_back_off_and_recover(engine, tmp_path):
+    log = AuditLog(create_engine(f"sqlite:///{tmp_path}/missing/audit.db"), capacity=10,
+                   flush_interval_ms=500, retry_max_seconds=3)
+    log.record("patient_profile", 1)
+
+    assert log.retry_delay() == 0.5
+    for expected in (1, 2, 3, 3):
+        assert log.flush() == 0
+        assert log.retry_delay() == expected
+    assert log.metrics()["buffered"] == 1
+
+    log.engine = engine
+    assert log.flush() == 1
+    assert log.failures == 0 and log.retry_delay() == 0.5
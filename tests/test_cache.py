@@ -0,0 +1,34 @@
+from app import models
+from app.cache import InvalidationSubscriber, LocalCache
+
+
+def _insert(conn, seq=None, key="1"):
+    values = {"Cache": "test_user", "Key": key}
+    if seq is not None:
+        values["Seq"] = seq
+    return conn.execute(models.CacheInvalidation.__table__.insert().values(**values)).inserted_primary_key[0]
+
+
+def test_gap_committed_after_flush_is_still_applied(engine):
+    cache = LocalCache("test_user")
+    subscriber = InvalidationSubscriber(engine, grace_seconds=0)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        subscriber._reset(conn)
+        _insert(conn, seq=2, key="2")  # seq 1 belongs to a transaction still open
+        subscriber._fetch(conn, newer=True)
+        subscriber._check_gaps(conn)  # grace over: flush and remember seq 1
+        assert subscriber.late and not subscriber.missing
+
+        cache.set("1", b"reloaded before the late commit")
+        _insert(conn, seq=1, key="1")
+        subscriber._fetch(conn, newer=True)
+
+    assert cache.get("1") is None
+    assert not subscriber.late
+
+
+def test_sequence_numbers_are_not_reused_after_pruning(engine):
+    with engine.begin() as conn:
+        first = _insert(conn)
+        conn.execute(models.CacheInvalidation.__table__.delete())
+        assert _insert(conn) > first
@@ -0,0 +1,39 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.coalesce import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight("test_shared")
+    release = threading.Event()
+    runs = []
+
+    def load():
+        runs.append(1)
+        release.wait(5)
+        return b"[]"
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(flight.do, "today", load) for _ in range(8)]
+        while flight.metrics()["suppressed"] < 7:
+            time.sleep(0.001)
+        release.set()
+        assert {f.result() for f in futures} == {b"[]"}
+
+    assert len(runs) == 1
+    metrics = flight.metrics()
+    assert metrics["executions"] == 1 and metrics["peak_waiters"] == 7 and metrics["in_flight"] == 0
+
+
+def test_errors_are_raised_and_not_kept():
+    flight = SingleFlight("test_errors")
+
+    def fail():
+        raise RuntimeError("database down")
+
+    with pytest.raises(RuntimeError):
+        flight.do("today", fail)
+    assert flight.do("today", lambda: b"ok") == b"ok"
+    assert flight.metrics()["errors"] == 1
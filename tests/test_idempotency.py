@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+from app import idempotency
+from app.idempotency import IdempotencyStore
+
+
+def test_claim_is_shared_between_stores(engine):
+    first, second = IdempotencyStore(engine), IdempotencyStore(engine)
+
+    state, claimed_at = first.claim("k", "body")
+    assert state == "claimed"
+    assert second.claim("k", "body")[0] == "running"
+    assert second.claim("k", "other body")[0] == "mismatch"
+
+    first.complete("k", claimed_at, 201, [(b"content-type", b"application/json")], b'{"ok":true}')
+    state, row = second.claim("k", "body")
+    assert state == "done"
+    assert idempotency._replay(row).body == b'{"ok":true}'
+
+
+def test_released_and_expired_claims_can_be_taken_over(engine):
+    store = IdempotencyStore(engine, lock_seconds=-1)
+    assert store.claim("k", "body")[0] == "claimed"
+    assert store.claim("k", "body")[0] == "claimed"  # previous claim's worker presumed dead
+
+    store = IdempotencyStore(engine)
+    store.release("k", store.claim("k", "body")[1])
+    assert store.claim("k", "body")[0] == "claimed"
+
+
+def test_late_owner_cannot_touch_a_taken_over_claim(engine):
+    stale = IdempotencyStore(engine, lock_seconds=-1)
+    _, lost_claim = stale.claim("k", "body")
+    store = IdempotencyStore(engine)
+    _, claimed_at = store.claim("k", "body")
+
+    assert not stale.complete("k", lost_claim, 201, [], b"from the old worker")
+    stale.release("k", lost_claim)
+    assert store.claim("k", "body")[0] == "running"
+
+    assert store.complete("k", claimed_at, 201, [], b"from the new worker")
+    state, row = store.claim("k", "body")
+    assert state == "done" and idempotency._replay(row).body == b"from the new worker"
+
+
+def test_keys_do_not_depend_on_the_client_address():
+    def request(headers, host="10.0.0.1"):
+        return SimpleNamespace(headers=headers, client=SimpleNamespace(host=host),
+                               method="POST", url=SimpleNamespace(path="/auth/register"))
+
+    alice = idempotency._key_hash(request({"X-User-ID": "1"}), "k")
+    bob = idempotency._key_hash(request({"X-User-ID": "2"}), "k")
+    anonymous = idempotency._key_hash(request({}), "k")
+    assert len({alice, bob, anonymous}) == 3
+    # A phone that moves from Wi-Fi to mobile data retries from a new address
+    assert anonymous == idempotency._key_hash(request({}, host="100.64.0.7"), "k")
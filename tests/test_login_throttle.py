@@ -0,0 +1,38 @@
+from app.core.security import LoginThrottle
+
+NAT = "10.0.0.1"
+
+
+def test_lockout_does_not_spread_to_other_users_on_the_same_ip():
+    throttle = LoginThrottle(rate_per_minute=600, burst=100, max_failures=3)
+    for _ in range(3):
+        assert throttle.check(NAT, "mallory@example.com") is None
+        throttle.record_failure(NAT, "mallory@example.com")
+
+    assert throttle.check(NAT, "mallory@example.com") is not None
+    assert throttle.check(NAT, "alice@example.com") is None
+    assert throttle.check("10.0.0.2", "mallory@example.com") is None
+
+
+def test_ip_bucket_is_looser_than_the_email_bucket():
+    throttle = LoginThrottle(burst=2, ip_burst=10)
+    assert throttle.check(NAT, "alice@example.com") is None
+    assert throttle.check(NAT, "alice@example.com") is None
+    assert throttle.check(NAT, "alice@example.com") is not None
+
+    staff = [f"staff{i}@example.com" for i in range(8)]
+    assert all(throttle.check(NAT, email) is None for email in staff)
+    assert throttle.check(NAT, "late@example.com") is not None
+
+
+def test_only_rejections_for_known_accounts_count_as_shed_hashes():
+    throttle = LoginThrottle(burst=1)
+    throttle.record_verify("alice@example.com", 0.25)
+    for email in ("alice@example.com", "nobody@example.com"):
+        throttle.check(NAT, email)
+        assert throttle.check(NAT, email) is not None
+
+    metrics = throttle.metrics()
+    assert metrics["rejected_rate_limited"] == 2
+    assert metrics["hashes_shed"] == 1
+    assert metrics["hash_seconds_shed"] == 0.25
@@ -0,0 +1,35 @@
+from datetime import date, timedelta
+import pytest
+from app import main, partitioning
+
+pq = pytest.importorskip("pyarrow.parquet")
+pa = pytest.importorskip("pyarrow")
+
+
+def _write_month(archive_dir, month, first_id):
+    path = partitioning._archive_path(str(archive_dir), month)
+    days = [month + timedelta(days=offset) for offset in range(28)]
+    rows = [{"AttendanceID": first_id + i, "UserID": 1 + i % 2, "Date": day} for i, day in enumerate(days)]
+    (archive_dir / partitioning.TABLE).mkdir(exist_ok=True)
+    pq.write_table(pa.Table.from_pylist(rows, schema=partitioning._ARCHIVE_SCHEMA), path)
+
+
+def test_read_archive_pages_across_months(tmp_path):
+    _write_month(tmp_path, date(2021, 1, 1), 1)
+    _write_month(tmp_path, date(2021, 2, 1), 100)
+
+    everything = list(partitioning.iter_archive(date(2021, 1, 1), date(2021, 2, 28), archive_dir=str(tmp_path)))
+    assert len(everything) == 56
+
+    page = partitioning.read_archive(date(2021, 1, 1), date(2021, 2, 28), user_id=1, limit=5, offset=12,
+                                     archive_dir=str(tmp_path))
+    assert [row["AttendanceID"] for row in page] == [25, 27, 100, 102, 104]
+
+
+def test_partition_maintenance_failure_does_not_stop_startup(monkeypatch, caplog):
+    def broken(engine):
+        raise RuntimeError("default partition holds rows for the new range")
+
+    monkeypatch.setattr(partitioning, "ensure_upcoming_partitions", broken)
+    main.create_upcoming_partitions()
+    assert "Could not create upcoming Attendance partitions" in caplog.text
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import models
+from app.crud import patient as crud_patient
+from app.serialization import PatientSyncAdapter, dump
+
+
+def _seed_patient(db):
+    db.add(models.User(UserID=1, FirstName="Asha", Email="p1@example.com", Phone="9000000001",
+                       Password="x", RoleID=3))
+    db.add(models.PatientProfile(PatientID=1, RiskCategory="Low"))
+    appointment = models.Appointment(PatientID=1, Type="Walk-in")  # not yet scheduled
+    booking = models.InvestigationBooking(Status="Booked")
+    booking.reports.append(models.Report())
+    appointment.bookings.append(booking)
+    appointment.consultations.append(models.Consultation())
+    db.add(appointment)
+    db.commit()
+    return appointment
+
+
+def test_full_sync_serializes_unset_columns(db):
+    _seed_patient(db)
+
+    body = dump(PatientSyncAdapter, crud_patient.get_patient_changes(db, 1))
+
+    assert body["Appointments"][0]["DateTime"] is None
+    assert body["Appointments"][0]["DoctorID"] is None
+    assert body["Bookings"][0]["LabID"] is None
+    assert body["Reports"][0]["FilePath"] is None
+    assert len(body["Consultations"]) == 1
+
+
+def test_delta_sync_returns_changes_and_tombstones(db):
+    appointment = _seed_patient(db)
+    since = datetime.utcnow() + timedelta(seconds=1)
+
+    assert dump(PatientSyncAdapter, crud_patient.get_patient_changes(db, 1, since))["Appointments"] == []
+
+    db.delete(appointment.consultations[0])
+    appointment.Status = "Cancelled"
+    appointment.UpdatedAt = since + timedelta(seconds=1)
+    db.commit()
+
+    body = dump(PatientSyncAdapter, crud_patient.get_patient_changes(db, 1, since - timedelta(seconds=1)))
+    assert [a["Status"] for a in body["Appointments"]] == ["Cancelled"]
+    assert [(t["Entity"], t["EntityID"]) for t in body["Tombstones"]] == [("Consultation", 1)]
+
+
+def test_sync_queries_use_patient_indexes(db, engine):
+    _seed_patient(db)
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    crud_patient.get_patient_changes(db, 1)
+    crud_patient.get_patient_changes(db, 1, datetime.utcnow() - timedelta(days=1))
+    event.remove(engine, "before_cursor_execute", record)
+
+    with engine.connect() as conn:
+        plans = [
+            detail
+            for statement, parameters in executed
+            for *_, detail in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        ]
+    assert not [detail for detail in plans if detail.startswith("SCAN")], plans
+    assert any("ix_Appointments_PatientID_UpdatedAt" in detail for detail in plans), plans
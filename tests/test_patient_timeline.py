@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import models
+from app.crud import patient as crud_patient
+from app.serialization import PatientTimelineAdapter, dump
+
+
+def _seed_patient(db, user_id, appointments):
+    db.add(models.User(UserID=user_id, FirstName="Asha", Email=f"p{user_id}@example.com",
+                       Phone=f"90000{user_id:05d}", Password="x", RoleID=3))
+    db.add(models.PatientProfile(PatientID=user_id, RiskCategory="Low"))
+    start = datetime(2024, 1, 1, 9, 0)
+    for i in range(appointments):
+        appointment = models.Appointment(PatientID=user_id, DateTime=start + timedelta(days=i),
+                                         Type="OPD", Status="Completed")
+        appointment.consultations.append(models.Consultation(Notes="Review", FollowUpRequired=False))
+        booking = models.InvestigationBooking(Status="Reported")  # no lab assigned
+        booking.reports.append(models.Report(AbnormalFlag=False))  # file not uploaded yet
+        appointment.bookings.append(booking)
+        appointment.bills.append(models.Billing(Amount=500, FinalAmount=500))  # unpaid
+        db.add(appointment)
+    db.commit()
+    db.expunge_all()
+
+
+def _load_timeline(db, statements, patient_id):
+    statements.clear()
+    timeline = crud_patient.get_patient_timeline(db, patient_id, limit=1000)
+    body = dump(PatientTimelineAdapter, timeline)
+    db.expunge_all()
+    return len(statements), body
+
+
+def test_timeline_query_count_is_independent_of_history(db, statements):
+    _seed_patient(db, 1, appointments=5)
+    _seed_patient(db, 2, appointments=50)
+
+    small_queries, small = _load_timeline(db, statements, 1)
+    large_queries, large = _load_timeline(db, statements, 2)
+
+    assert len(small["Appointments"]) == 5
+    assert len(large["Appointments"]) == 50
+    assert small_queries == large_queries == 5
+
+
+def test_timeline_serializes_unset_foreign_keys(db, statements):
+    _seed_patient(db, 1, appointments=1)
+
+    _, body = _load_timeline(db, statements, 1)
+
+    appointment = body["Appointments"][0]
+    assert appointment["DoctorID"] is None
+    assert appointment["Bills"][0]["PaymentID"] is None
+    assert appointment["Bookings"][0]["LabID"] is None
+    assert appointment["Bookings"][0]["Reports"][0]["FilePath"] is None
+
+
+def test_timeline_pages_newest_first(db, statements):
+    _seed_patient(db, 1, appointments=5)
+
+    first = crud_patient.get_patient_timeline(db, 1, limit=3)
+    second = crud_patient.get_patient_timeline(db, 1, before=first["NextBefore"],
+                                               before_id=first["NextBeforeID"], limit=3)
+
+    dates = [a.DateTime for a in first["Appointments"] + second["Appointments"]]
+    assert dates == sorted(dates, reverse=True) and len(set(dates)) == 5
+    assert second["NextBefore"] is None
+
+
+def test_timeline_queries_use_indexes(db, engine):
+    _seed_patient(db, 1, appointments=3)
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    crud_patient.get_patient_timeline(db, 1)
+    event.remove(engine, "before_cursor_execute", record)
+
+    with engine.connect() as conn:
+        plans = [
+            detail
+            for statement, parameters in executed
+            for *_, detail in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        ]
+    assert len(executed) == 5
+    assert not [detail for detail in plans if detail.startswith("SCAN")], plans
@@ -0,0 +1,64 @@
+from datetime import date, datetime
+import pytest
+from app import models
+from app.payroll import FIELDS, _accumulate, aggregate_batch
+
+
+def _totals(punches):
+    """Run aggregate_batch on (UserID, Date, InTime, OutTime) tuples under the default shift (09:00, 8h, 10 min grace)."""
+    user_ids, days, in_times, out_times = zip(*punches)
+    users, totals = aggregate_batch(user_ids, days, in_times, out_times,
+                                    [None] * len(punches), [None] * len(punches))
+    return {user: dict(zip(FIELDS, row.tolist())) for user, row in zip(users.tolist(), totals)}
+
+
+def _at(day, hh, mm=0):
+    return datetime(day.year, day.month, day.day, hh, mm)
+
+
+def test_lateness_overtime_and_missing_punch_out():
+    mon, tue, wed = date(2024, 3, 4), date(2024, 3, 5), date(2024, 3, 6)
+    totals = _totals([
+        (1, mon, _at(mon, 9, 5), _at(mon, 17, 5)),   # inside the grace period
+        (1, tue, _at(tue, 9, 30), _at(tue, 19, 30)),  # 30 minutes late, 2h overtime
+        (1, wed, _at(wed, 9), None),                  # never punched out
+    ])
+    assert totals[1] == {
+        "DaysWorked": 3, "HoursWorked": 18, "LateArrivals": 1, "LateMinutes": 30,
+        "OvertimeHours": 2, "MissingPunches": 1,
+    }
+
+
+def test_several_punches_on_one_day_count_once():
+    day = date(2024, 3, 4)
+    totals = _totals([
+        (2, day, _at(day, 13), _at(day, 19)),   # second half of a split shift
+        (2, day, _at(day, 8), _at(day, 12)),
+        (3, day, _at(day, 9), _at(day, 12)),
+        (3, day, _at(day, 12, 30), None),       # re-punch that never closed
+    ])
+    assert totals[2] == {
+        "DaysWorked": 1, "HoursWorked": 10, "LateArrivals": 0, "LateMinutes": 0,
+        "OvertimeHours": 2, "MissingPunches": 0,
+    }
+    assert totals[3]["DaysWorked"] == 1
+    assert totals[3]["LateArrivals"] == 0
+    assert totals[3]["MissingPunches"] == 1
+    assert totals[3]["HoursWorked"] == pytest.approx(3)
+
+
+def test_a_day_split_across_fetch_batches_counts_once(db):
+    day = date(2024, 3, 4)
+    db.add_all([models.Employee(EmployeeID=user) for user in (1, 2)])
+    db.add_all([
+        models.Attendance(UserID=1, Date=day, InTime=_at(day, 9), OutTime=_at(day, 17)),
+        models.Attendance(UserID=2, Date=day, InTime=_at(day, 8), OutTime=_at(day, 12)),
+        models.Attendance(UserID=2, Date=day, InTime=_at(day, 13), OutTime=_at(day, 19)),
+    ])
+    db.commit()
+
+    totals, profiles = {}, {}
+    _accumulate(db, day, date(2024, 3, 5), totals, profiles, batch_size=2)
+    assert dict(zip(FIELDS, totals[2].tolist()))["DaysWorked"] == 1
+    assert dict(zip(FIELDS, totals[2].tolist()))["LateArrivals"] == 0
+    assert totals[1][0] == 1
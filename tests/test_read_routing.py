@@ -0,0 +1,74 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select, text
+from app import database, models
+from app.database import Base, LastWriteMiddleware, create_routing_sessionmaker
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    primary = create_engine(f"sqlite:///{tmp_path}/primary.db")
+    replica = create_engine(f"sqlite:///{tmp_path}/replica.db")
+    for bind, name in ((primary, "primary"), (replica, "replica")):
+        Base.metadata.create_all(bind)
+        with bind.begin() as conn:
+            conn.execute(models.Payment.__table__.insert().values(PaymentID=1, Method=name))
+    yield create_routing_sessionmaker(primary, [replica])
+    primary.dispose()
+    replica.dispose()
+
+
+def _method(db):
+    return db.execute(select(models.Payment.Method)).scalar_one()
+
+
+def test_reads_go_to_replica_until_the_session_writes(sessions):
+    with sessions() as db:
+        assert _method(db) == "replica"
+        assert db.execute(text('SELECT "Method" FROM "Payments"')).scalar_one() == "replica"
+
+        db.add(models.Payment(PaymentID=2, Method="new"))
+        db.flush()
+        assert db.execute(select(models.Payment.Method).where(models.Payment.PaymentID == 1)).scalar_one() == "primary"
+
+
+def test_locking_and_raw_write_statements_use_the_primary(sessions):
+    with sessions() as db:
+        assert db.execute(select(models.Payment.Method).with_for_update()).scalar_one() == "primary"
+    # SQLite can't run these, so check where they would be sent
+    for sql in ('SELECT "Method" FROM "Payments"\nFOR UPDATE SKIP LOCKED',
+                'select "Method" from "Payments" for no key update'):
+        with sessions() as db:
+            assert db.get_bind(clause=text(sql)) is db.primary
+    with sessions() as db:
+        db.execute(text('UPDATE "Payments" SET "Status" = \'Settled\''))
+        assert _method(db) == "primary"
+
+
+def test_pinned_session_reads_from_the_primary(sessions):
+    with sessions(pinned=True) as db:
+        assert _method(db) == "primary"
+
+
+def test_client_reads_its_own_write_from_the_primary(sessions, monkeypatch):
+    monkeypatch.setattr(database, "ReadSessionLocal", sessions)
+    app = FastAPI()
+    app.add_middleware(LastWriteMiddleware)
+
+    @app.post("/payments")
+    def write():
+        return {}
+
+    @app.get("/payments/1")
+    def read(db=Depends(database.get_read_db)):
+        return {"source": _method(db)}
+
+    writer, reader = TestClient(app), TestClient(app)
+    assert writer.get("/payments/1").json() == {"source": "replica"}
+    writer.post("/payments")
+    assert writer.get("/payments/1").json() == {"source": "primary"}
+    assert reader.get("/payments/1").json() == {"source": "replica"}
+
+    stamp = writer.post("/payments").headers[database.LAST_WRITE_HEADER]
+    assert reader.get("/payments/1", headers={database.LAST_WRITE_HEADER: stamp}).json() == {"source": "primary"}
@@ -0,0 +1,32 @@
+import csv
+from app import models
+from app.reconciliation import reconcile
+
+
+def test_duplicate_db_references_are_reported_not_dropped(db, tmp_path):
+    db.add_all([
+        models.Payment(PaymentID=1, TransactionRef="TX-1", Status="Pending"),
+        models.Payment(PaymentID=2, TransactionRef="TX-DUP", Status="Pending"),
+        models.Payment(PaymentID=3, TransactionRef="TX-DUP", Status="Pending"),
+    ])
+    db.commit()
+    statement = tmp_path / "statement.csv"
+    statement.write_text("TransactionRef,Amount,Status\nTX-1,100,success\nTX-DUP,50,success\n")
+    report = tmp_path / "report.csv"
+
+    summary = reconcile(db, str(statement), str(report))
+
+    assert summary["matched"] == 1
+    assert summary["open_payments"] == 3
+    assert summary["duplicate_db_references"] == 1
+    with open(report, newline="") as f:
+        rows = [(row["Reason"], row["PaymentID"]) for row in csv.DictReader(f)]
+    assert sorted(rows) == [
+        ("duplicate_reference_in_db", ""),
+        ("duplicate_reference_in_db", "2"),
+        ("duplicate_reference_in_db", "3"),
+    ]
+    db.expire_all()
+    assert [p.Status for p in db.query(models.Payment).order_by(models.Payment.PaymentID)] == [
+        "Settled", "Pending", "Pending",
+    ]
@@ -0,0 +1,76 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app import models
+from app.core.bloom import BloomFilter
+from app.crud import users as crud_users
+from app.database import get_db
+from app.routers import auth
+
+
+@pytest.fixture
+def identities(monkeypatch):
+    """An empty, ready filter: every email/phone looks definitely new."""
+    identities = BloomFilter(capacity=100)
+    monkeypatch.setattr(crud_users, "_identity_filter", identities)
+    monkeypatch.setattr(crud_users, "_added_during_build", None)
+    return identities
+
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(auth.router)
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app)
+
+
+def _body(email, phone):
+    return {"FirstName": "Asha", "LastName": None, "Email": email, "Phone": phone,
+            "Password": "secret123", "RoleID": 3}
+
+
+def test_bloom_false_positive_still_registers(client, db, identities):
+    identities.add("email:new@example.com")  # "maybe taken", but no such user
+
+    response = client.post("/auth/register", json=_body("new@example.com", "9000000001"))
+
+    assert response.status_code == 200
+    assert db.query(models.User).filter_by(Email="new@example.com").count() == 1
+    assert identities.might_contain("phone:9000000001")
+
+
+@pytest.mark.parametrize("email, phone, field", [
+    ("taken@example.com", "9000000002", "Email"),
+    ("other@example.com", "9000000001", "Phone"),
+])
+def test_racing_duplicate_is_a_400(client, db, identities, email, phone, field):
+    # Registered by another worker after this one's filter was built
+    db.add(models.User(FirstName="Ravi", Email="taken@example.com", Phone="9000000001", Password="x", RoleID=3))
+    db.commit()
+
+    response = client.post("/auth/register", json=_body(email, phone))
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": f"{field} already registered"}
+
+
+def test_build_keeps_registrations_made_while_it_ran(engine, db, monkeypatch):
+    monkeypatch.setattr(crud_users, "_identity_filter", None)
+    db.add(models.User(FirstName="Ravi", Email="old@example.com", Phone="9000000001", Password="x", RoleID=3))
+    db.commit()
+
+    real_filter = crud_users.BloomFilter
+
+    def filter_with_concurrent_registration(**kwargs):
+        # The table snapshot is being read; another request registers a user
+        crud_users._added_during_build.append("email:during@example.com")
+        return real_filter(**kwargs)
+
+    monkeypatch.setattr(crud_users, "BloomFilter", filter_with_concurrent_registration)
+    crud_users.build_identity_filter(engine)
+
+    identities = crud_users._identity_filter
+    assert identities.might_contain("email:old@example.com")
+    assert identities.might_contain("email:during@example.com")
+    assert crud_users._added_during_build is None
@@ -0,0 +1,63 @@
+from datetime import date, datetime, timedelta
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app import walkin
+
+
+@pytest.fixture
+def sessions(engine):
+    """Two sessions on one database, standing in for two API workers."""
+    factory = sessionmaker(bind=engine)
+    first, second = factory(), factory()
+    yield first, second
+    first.close()
+    second.close()
+
+
+def test_token_numbers_are_unique_across_workers(sessions):
+    first, second = sessions
+    numbers = [walkin.issue_token(db, "doctor-1", patient_id, None)["TokenNumber"]
+               for patient_id, db in enumerate([first, second, first, second], start=1)]
+    assert numbers == [1, 2, 3, 4]
+    assert walkin.issue_token(first, "ward-A", 9, None)["TokenNumber"] == 1
+
+
+def test_risk_boost_and_reprioritize_change_serving_order(sessions):
+    first, second = sessions
+    walkin.issue_token(first, "doctor-1", 1, "Low")
+    walkin.issue_token(first, "doctor-1", 2, None)
+    assert walkin.issue_token(second, "doctor-1", 3, "High")["Position"] == 1
+
+    assert walkin.reprioritize(second, "doctor-1", 2, "Medium")["Position"] == 2
+    board = walkin.board(first, "doctor-1")
+    assert [t["TokenNumber"] for t in board["Waiting"]] == [3, 2, 1]
+
+    assert walkin.call_next(first, "doctor-1")["TokenNumber"] == 3
+    assert walkin.call_next(second, "doctor-1")["TokenNumber"] == 2
+    assert walkin.complete(first, "doctor-1", 3)["Status"] == "completed"
+    with pytest.raises(ValueError):
+        walkin.reprioritize(first, "doctor-1", 2, "High")
+
+
+def test_reads_do_not_create_state(sessions):
+    first, _ = sessions
+    assert walkin.call_next(first, "ward-B") is None
+    assert walkin.token_status(first, "ward-B", 1) is None
+    assert walkin.board(first, "ward-B")["Waiting"] == []
+    with pytest.raises(ValueError):
+        walkin.parse_queue_key("garbage")
+
+
+def test_timestamps_are_utc_and_service_date_is_local(sessions, monkeypatch):
+    first, _ = sessions
+    monkeypatch.setattr(walkin, "service_date", lambda: date(2024, 3, 5))  # local day ahead of UTC
+
+    token = walkin.issue_token(first, "doctor-1", 1, None)
+    assert token["ServiceDate"] == date(2024, 3, 5)
+    assert abs(token["ArrivedAt"] - datetime.utcnow()) < timedelta(seconds=5)
+
+    called = walkin.call_next(first, "doctor-1")
+    done = walkin.complete(first, "doctor-1", called["TokenNumber"])
+    assert abs(done["CompletedAt"] - datetime.utcnow()) < timedelta(seconds=5)
+    assert done["CalledAt"] <= done["CompletedAt"]
+    assert walkin.cancel_stale_tokens(first.get_bind()) == 0
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+import pytest
+from app import jobs, models
+from app.database import Base, SessionLocal, engine as app_engine
+from app.worker import Worker
+from app.core.config import JOB_LOCK_TIMEOUT_SECONDS, JOB_QUEUES
+
+
+@pytest.fixture
+def jobs_db():
+    # Worker uses the app's SessionLocal, so these tests run on the app database
+    Base.metadata.create_all(app_engine, tables=[models.Job.__table__])
+    db = SessionLocal()
+    yield db
+    db.query(models.Job).delete()
+    db.commit()
+    db.close()
+
+
+@pytest.fixture
+def workers():
+    created = [Worker(queues={"default": 2}) for _ in range(2)]
+    yield created
+    for worker in created:
+        worker.executor.shutdown(wait=False)
+
+
+def _add_job(db, **values):
+    job = models.Job(Name="noop", Queue="default", Payload={}, **values)
+    db.add(job)
+    db.commit()
+    return job.JobID
+
+
+def _expire_lock(db, job_id):
+    stale = datetime.utcnow() - timedelta(seconds=JOB_LOCK_TIMEOUT_SECONDS + 1)
+    db.query(models.Job).filter(models.Job.JobID == job_id).update({"LockedAt": stale})
+    db.commit()
+    return stale
+
+
+def test_stale_job_out_of_attempts_is_failed_not_rerun(jobs_db, workers):
+    stale = datetime.utcnow() - timedelta(seconds=JOB_LOCK_TIMEOUT_SECONDS + 1)
+    exhausted = _add_job(jobs_db, Status="running", Attempts=5, MaxAttempts=5, LockedAt=stale)
+    retryable = _add_job(jobs_db, Status="running", Attempts=1, MaxAttempts=5, LockedAt=stale)
+
+    claimed = [job_id for job_id, _, _ in workers[0].claim("default", 10)]
+
+    assert claimed == [retryable]
+    jobs_db.expire_all()
+    assert jobs_db.get(models.Job, exhausted).Status == "failed"
+
+
+def test_taken_over_job_keeps_new_owners_result(jobs_db, workers):
+    first, second = workers
+    job_id = _add_job(jobs_db)
+    assert [j for j, _, _ in first.claim("default", 1)] == [job_id]
+
+    _expire_lock(jobs_db, job_id)
+    assert [j for j, _, _ in second.claim("default", 1)] == [job_id]
+
+    assert first.finish(job_id, error="late failure") is False
+    assert second.finish(job_id) is True
+    jobs_db.expire_all()
+    assert jobs_db.get(models.Job, job_id).Status == "done"
+
+
+def test_heartbeat_keeps_long_job_from_going_stale(jobs_db, workers):
+    first, second = workers
+    job_id = _add_job(jobs_db)
+    first.claim("default", 1)
+    stale = _expire_lock(jobs_db, job_id)
+    first.owned[job_id] = stale  # as if the worker had last written this value
+
+    first.heartbeat()
+
+    assert second.claim("default", 1) == []
+    assert first.finish(job_id) is True
+
+
+def test_report_jobs_run_with_default_settings(db):
+    jobs.import_job_modules()
+    assert jobs.enqueue(db, "payments.reconcile", {}).Queue == "reports"
+    assert "reports" in JOB_QUEUES
+
+
+def test_enqueue_rejects_unregistered_jobs(db):
+    with pytest.raises(LookupError):
+        jobs.enqueue(db, "payments.reconcil")